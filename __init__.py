@@ -1,14 +1,39 @@
-try:
-    from python_wrappers.file_wrapper import file_io, file_work, file_process, logger
-    from python_wrappers.google_drive_wrapper import google_drive
-    from python_wrappers.google_sheets_wrapper import google_sheet
-    from python_wrappers.ip_wrapper import _ip
-    from python_wrappers.selenium_wrapper import _selenium, acts
-    from python_wrappers.telegram_wrapper import telegram
-except:
-    from file_wrapper import file_io, file_work, file_process, logger
-    from google_drive_wrapper import google_drive
-    from google_sheets_wrapper import google_sheet
-    from ip_wrapper import _ip
-    from selenium_wrapper import _selenium, acts
-    from telegram_wrapper import telegram
\ No newline at end of file
+import importlib
+
+# Wrappers are imported on first use (PEP 562), so a script that only needs file_io does not load selenium or the Google clients.
+_exports = {
+    'file_io': 'file_wrapper',
+    'file_work': 'file_wrapper',
+    'file_process': 'file_wrapper',
+    'logger': 'file_wrapper',
+    'google_drive': 'google_drive_wrapper',
+    'google_drive_mirror': 'google_drive_wrapper',
+    'google_sheet': 'google_sheets_wrapper',
+    'service_pool': 'google_service_pool',
+    '_ip': 'ip_wrapper',
+    '_selenium': 'selenium_wrapper',
+    'driver_pool': 'selenium_wrapper',
+    'scrape_scheduler': 'selenium_wrapper',
+    'acts': 'selenium_wrapper',
+    'telegram': 'telegram_wrapper',
+    'http_client': 'http_pool',
+    'async_http': 'async_pool',
+    'enable': 'instrumentation',
+    'disable': 'instrumentation',
+    'memory_registry': 'instrumentation',
+    'otel_sink': 'instrumentation',
+}
+
+__all__ = list(_exports)
+
+
+def __getattr__(name):
+    if name not in _exports:
+        raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+    value = getattr(importlib.import_module("." + _exports[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
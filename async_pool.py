@@ -0,0 +1,158 @@
+import asyncio
+import threading
+
+try:
+    from .instrumentation import add_api_calls
+except ImportError:
+    from instrumentation import add_api_calls
+
+
+class async_http():
+    # One aiohttp session and one set of semaphores per event loop, shared by every wrapper running on that loop.
+    # Entries of loops that ended without close() are dropped when a new loop registers, see _evict_closed_loops.
+    _sessions = {}
+    _semaphores = {}
+    _lock = threading.Lock()
+
+    # Total open connections of a session, and the default number of requests in flight per wrapper.
+    connection_limit = 200
+    default_limit = 100
+
+    @classmethod
+    def session(cls):
+        """
+        Get the aiohttp session of the running event loop, creating it on first use.
+        :return: object: aiohttp.ClientSession.
+        """
+        import aiohttp
+
+        loop = asyncio.get_running_loop()
+        with cls._lock:
+            session = cls._sessions.get(loop)
+            if session is None or session.closed:
+                cls._evict_closed_loops()
+                session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=cls.connection_limit),
+                                                timeout=aiohttp.ClientTimeout(total=None, sock_connect=5, sock_read=30))
+                cls._sessions[loop] = session
+            return session
+
+    @classmethod
+    def semaphore(cls, name, limit=0):
+        """
+        Get the semaphore limiting how many requests of one wrapper are in flight on the running event loop.
+        :param name: string: Name of the wrapper. Example: telegram
+        :param limit: int: Maximum requests in flight. Only used when the semaphore is created. If 0, default_limit is used.
+        :return: object: asyncio.Semaphore.
+        """
+        key = (asyncio.get_running_loop(), name)
+        with cls._lock:
+            if key not in cls._semaphores:
+                cls._evict_closed_loops()
+                cls._semaphores[key] = asyncio.Semaphore(limit or cls.default_limit)
+            return cls._semaphores[key]
+
+    @classmethod
+    async def request(cls, method, url, name="default", limit=0, retries=3, backoff_factor=0.5,
+                      status_forcelist=(429, 500, 502, 503, 504), read_retries=None, **kwargs):
+        """
+        Send a request with the shared session, retrying with backoff on 429 and 5xx responses and honoring Retry-After.
+        :param method: string: HTTP method. Example: GET
+        :param url: string: URL to request.
+        :param name: string: Name of the wrapper, used for its concurrency limit.
+        :param limit: int: Maximum requests in flight for this wrapper. If 0, default_limit is used.
+        :param retries: int: Number of retries on connection errors and status_forcelist responses.
+        :param backoff_factor: float: Backoff between retries is backoff_factor * 2 ** (retry number - 1) seconds.
+        :param status_forcelist: tuple: Response status codes that are retried.
+        :param read_retries: int: Number of retries on errors after the request was sent, such as a read timeout. If None, retries is used.
+            Use 0, and leave 5xx out of status_forcelist, for requests that must not be sent twice.
+        :param kwargs: Passed to aiohttp.ClientSession.request. Example: params, json, data, headers.
+        :return: tuple: (status, headers, body bytes)
+        """
+        return await cls._send(method, url, name, limit, retries, backoff_factor, lambda response: response.read(),
+                               status_forcelist, read_retries, **kwargs)
+
+    @classmethod
+    async def download(cls, url, file_name, name="default", limit=0, retries=3, backoff_factor=0.5, chunk_size=1024 * 1024, **kwargs):
+        """
+        GET a URL and stream a 200 response to a file in chunks, so large files are never held in memory. Retries like request.
+        :param url: string: URL to download.
+        :param file_name: string: File, with path, to save the body to.
+        :param name: string: Name of the wrapper, used for its concurrency limit.
+        :param limit: int: Maximum requests in flight for this wrapper. If 0, default_limit is used.
+        :param retries: int: Number of retries on connection errors, 429 and 5xx responses.
+        :param backoff_factor: float: Backoff between retries is backoff_factor * 2 ** (retry number - 1) seconds.
+        :param chunk_size: int: Bytes read from the response and written to the file at a time.
+        :param kwargs: Passed to aiohttp.ClientSession.request. Example: params, headers.
+        :return: tuple: (status, headers, body bytes). Body is empty when status is 200 and the file was written, otherwise it is the error body.
+        """
+        async def save(response):
+            if response.status != 200:
+                return await response.read()
+            with open(file_name, 'wb') as file:
+                async for chunk in response.content.iter_chunked(chunk_size):
+                    file.write(chunk)
+            return b''
+
+        return await cls._send('GET', url, name, limit, retries, backoff_factor, save, **kwargs)
+
+    @classmethod
+    async def _send(cls, method, url, name, limit, retries, backoff_factor, read,
+                    status_forcelist=(429, 500, 502, 503, 504), read_retries=None, **kwargs):
+        """
+        Retry loop shared by request and download. read is awaited with each response and returns the body.
+        :return: tuple: (status, headers, body bytes)
+        """
+        import aiohttp
+
+        if read_retries is None:
+            read_retries = retries
+        read_errors = 0
+        async with cls.semaphore(name, limit):
+            for attempt in range(retries + 1):
+                delay = backoff_factor * 2 ** attempt
+                try:
+                    add_api_calls()
+                    async with cls.session().request(method, url, **kwargs) as response:
+                        body = await read(response)
+                        if response.status in status_forcelist and attempt < retries:
+                            retry_after = response.headers.get('Retry-After', '')
+                            if retry_after.isdigit():
+                                delay = int(retry_after)
+                        else:
+                            return response.status, response.headers, body
+                except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                    # A failed connect never reached the server. Anything else may have, and counts against read_retries.
+                    if not isinstance(e, aiohttp.ClientConnectorError):
+                        read_errors += 1
+                    if attempt >= retries or read_errors > read_retries:
+                        raise
+                await asyncio.sleep(delay)
+
+    @classmethod
+    async def close(cls):
+        """
+        Close the session of the running event loop. Call before the loop ends.
+        :return:
+        """
+        loop = asyncio.get_running_loop()
+        with cls._lock:
+            session = cls._sessions.pop(loop, None)
+            for key in [k for k in cls._semaphores if k[0] is loop]:
+                del cls._semaphores[key]
+        if session is not None:
+            await session.close()
+
+    @classmethod
+    def _evict_closed_loops(cls):
+        """
+        Drop sessions and semaphores of event loops that are closed, such as those of finished asyncio.run calls.
+        Their sessions cannot be closed any more, so they are only released. The caller must hold _lock.
+        """
+        for loop in [k for k in cls._sessions if k.is_closed()]:
+            del cls._sessions[loop]
+        for key in [k for k in cls._semaphores if k[0].is_closed()]:
+            del cls._semaphores[key]
+
+
+if __name__ == '__main__':
+    pass
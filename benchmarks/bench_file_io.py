@@ -0,0 +1,63 @@
+import pytest
+
+SIZES = [1024, 1024 * 1024, 16 * 1024 * 1024]
+
+
+def _text(size):
+    line = "The quick brown fox jumps over the lazy dog 0123456789\n"
+    return (line * (size // len(line) + 1))[:size]
+
+
+@pytest.fixture(params=SIZES, ids=lambda s: "{}KB".format(s // 1024))
+def text_file(request, tmp_path):
+    path = tmp_path / "data.txt"
+    path.write_text(_text(request.param), encoding='utf-8')
+    return str(path)
+
+
+def test_read_file(benchmark, pw, text_file):
+    benchmark(pw.file_io(text_file).read_file)
+
+
+def test_read_file_list(benchmark, pw, text_file):
+    benchmark(pw.file_io(text_file).read_file, return_list=True)
+
+
+@pytest.mark.parametrize('size', SIZES, ids=lambda s: "{}KB".format(s // 1024))
+def test_write_file_new(benchmark, pw, tmp_path, size):
+    benchmark(pw.file_io(str(tmp_path / "out.txt")).write_file_new, _text(size))
+
+
+def test_read_file_hex_dump(benchmark, pw, text_file):
+    benchmark(pw.file_io(text_file).read_file_hex_dump)
+
+
+@pytest.mark.parametrize('rows', [100, 10000, 100000])
+def test_write_csv(benchmark, pw, tmp_path, rows):
+    data = [[str(i), "name_{}".format(i), "x" * 20, str(i * 1.5)] for i in range(rows)]
+    assert benchmark(pw.file_io(str(tmp_path / "out.csv")).write_csv, data)
+
+
+@pytest.mark.parametrize('rows', [100, 10000, 100000])
+def test_read_csv(benchmark, pw, tmp_path, rows):
+    path = str(tmp_path / "in.csv")
+    pw.file_io(path).write_csv([[str(i), "name_{}".format(i), "x" * 20, str(i * 1.5)] for i in range(rows)])
+    assert len(benchmark(pw.file_io(path).read_csv)) == rows
+
+
+@pytest.mark.parametrize('rows', [100, 10000, 100000])
+def test_write_csv_from_dict(benchmark, pw, tmp_path, rows):
+    data = [{'id': i, 'name': "name_{}".format(i), 'value': i * 1.5} for i in range(rows)]
+    benchmark(pw.file_io(str(tmp_path / "out.csv")).write_csv_from_dict, ['id', 'name', 'value'], data)
+
+
+@pytest.mark.parametrize('items', [100, 10000, 100000])
+def test_json_round_trip(benchmark, pw, tmp_path, items):
+    f = pw.file_io(str(tmp_path / "data.json"))
+    data = {'items': [{'id': i, 'name': "name_{}".format(i), 'tags': ['a', 'b']} for i in range(items)]}
+
+    def round_trip():
+        f.write_json(data)
+        return f.read_json()
+
+    assert len(benchmark(round_trip)['items']) == items
@@ -0,0 +1,216 @@
+import time
+
+import pytest
+
+# Simulated round trip of one HTTP request to Google, so batching and call counts show up in the timings.
+LATENCY = 0.001
+
+
+class _counter():
+    def __init__(self):
+        self.calls = 0
+
+    def hit(self):
+        self.calls += 1
+        time.sleep(LATENCY)
+
+
+def _http_calls(counter, fn, *args, **kwargs):
+    """
+    Count the HTTP requests made by one call.
+    """
+    before = counter.calls
+    fn(*args, **kwargs)
+    return counter.calls - before
+
+
+class _request():
+    def __init__(self, counter, value):
+        self.counter = counter
+        self.value = value
+
+    def execute(self, num_retries=0):
+        self.counter.hit()
+        return self.value
+
+
+class _batch():
+    def __init__(self, counter, callback):
+        self.counter = counter
+        self.callback = callback
+        self.requests = []
+
+    def add(self, request, request_id=None):
+        self.requests.append((request_id, request))
+
+    def execute(self):
+        self.counter.hit()
+        for request_id, request in self.requests:
+            self.callback(request_id, request.value, None)
+
+
+class _files():
+    def __init__(self, counter, files):
+        self.counter = counter
+        self.files = files
+
+    def list(self, pageSize=10, fields="", q="", pageToken=None):
+        start = int(pageToken or 0)
+        result = {'files': self.files[start:start + pageSize]}
+        if start + pageSize < len(self.files):
+            result['nextPageToken'] = str(start + pageSize)
+        return _request(self.counter, result)
+
+    def delete(self, fileId):
+        return _request(self.counter, "")
+
+    def get(self, fileId, fields=""):
+        return _request(self.counter, {'id': fileId, 'name': fileId, 'parents': ['root']})
+
+
+class _drive_service():
+    def __init__(self, files=()):
+        self.counter = _counter()
+        self._files = _files(self.counter, list(files))
+
+    def files(self):
+        return self._files
+
+    def new_batch_http_request(self, callback=None):
+        return _batch(self.counter, callback)
+
+
+class _pool():
+    def __init__(self, service=None, client=None):
+        self._service = service
+        self._client = client
+
+    def service(self, name='drive', version='v3'):
+        return self._service
+
+    def gspread_client(self):
+        return self._client
+
+
+def _drive(pw, files=()):
+    drive = object.__new__(pw.google_drive)
+    drive.pool = _pool(service=_drive_service(files))
+    drive.creds = None
+    return drive
+
+
+@pytest.mark.parametrize('page_size', [10, 100, 1000])
+def test_drive_list_folder_content(benchmark, pw, page_size):
+    drive = _drive(pw, [{'id': str(i), 'name': "file_{}".format(i), 'parents': ['p']} for i in range(1000)])
+    benchmark.extra_info['http_calls'] = _http_calls(drive.drive_service.counter, drive.list_folder_content, parent_id='p', page_size=page_size)
+    assert len(benchmark(drive.list_folder_content, parent_id='p', page_size=page_size)) == 1000
+
+
+def test_drive_delete_loop(benchmark, pw):
+    drive = _drive(pw)
+    ids = [str(i) for i in range(200)]
+    benchmark.extra_info['http_calls'] = _http_calls(drive.drive_service.counter, lambda: [drive.delete_file(i) for i in ids])
+    benchmark.pedantic(lambda: [drive.delete_file(i) for i in ids], rounds=3)
+
+
+def test_drive_delete_many(benchmark, pw):
+    pytest.importorskip('googleapiclient')
+    drive = _drive(pw)
+    ids = [str(i) for i in range(200)]
+    benchmark.extra_info['http_calls'] = _http_calls(drive.drive_service.counter, drive.delete_many, ids)
+    assert all(benchmark.pedantic(drive.delete_many, args=(ids,), rounds=3).values())
+
+
+def test_drive_get_metadata_many(benchmark, pw):
+    pytest.importorskip('googleapiclient')
+    drive = _drive(pw)
+    ids = [str(i) for i in range(200)]
+    assert all(benchmark.pedantic(drive.get_metadata_many, args=(ids,), rounds=3).values())
+
+
+def test_drive_upload_many_all_unchanged(benchmark, pw, tmp_path):
+    paths = []
+    for i in range(50):
+        path = tmp_path / "file_{}.bin".format(i)
+        path.write_bytes(bytes([i]) * 64 * 1024)
+        paths.append(str(path))
+    drive = _drive(pw)
+    drive.pool = _pool(service=_drive_service([{'id': str(i), 'md5Checksum': drive._md5(p)} for i, p in enumerate(paths)]))
+    results = benchmark(drive.upload_many, paths, parent_id='p')
+    assert not any(r['uploaded'] for r in results)
+
+
+class _worksheet():
+    def __init__(self, counter, rows):
+        self.counter = counter
+        self.rows = rows
+
+    def get_all_values(self):
+        self.counter.hit()
+        return self.rows
+
+    def get_all_records(self):
+        self.counter.hit()
+        return [dict(zip(self.rows[0], row)) for row in self.rows[1:]]
+
+    def row_values(self, row):
+        self.counter.hit()
+        return self.rows[int(row) - 1]
+
+
+class _spreadsheet():
+    def __init__(self, counter, rows):
+        self.counter = counter
+        self.rows = rows
+        self.id = 'sheet_id'
+        self.title = 'sheet'
+
+    def worksheet(self, name):
+        self.counter.hit()
+        return _worksheet(self.counter, self.rows)
+
+    def values_append(self, *args, **kwargs):
+        self.counter.hit()
+
+    def values_update(self, *args, **kwargs):
+        self.counter.hit()
+
+
+class _gspread_client():
+    def __init__(self, rows):
+        self.counter = _counter()
+        self.rows = rows
+
+    def open(self, name):
+        self.counter.hit()
+        return _spreadsheet(self.counter, self.rows)
+
+    def open_by_key(self, key):
+        return self.open(key)
+
+
+def _sheet(pw, rows=()):
+    sheet = object.__new__(pw.google_sheet)
+    sheet.sheet_name = 'sheet'
+    sheet.sheet_id = 'sheet_id'
+    sheet.pool = _pool(client=_gspread_client([['id', 'name']] + [[str(i), "name_{}".format(i)] for i in range(len(rows))]))
+    return sheet
+
+
+@pytest.mark.parametrize('rows', [100, 10000])
+def test_sheet_upload_list_dicts(benchmark, pw, rows):
+    sheet = _sheet(pw)
+    data = [{'id': i, 'name': "name_{}".format(i)} for i in range(rows)]
+    assert benchmark(sheet.upload_list, 'Sheet1', data)
+
+
+@pytest.mark.parametrize('rows', [100, 10000])
+def test_sheet_get_all_values_dict(benchmark, pw, rows):
+    sheet = _sheet(pw, range(rows))
+    assert len(benchmark(sheet.get_all_values_dict, 'Sheet1')) == rows
+
+
+def test_sheet_row_reads(benchmark, pw):
+    sheet = _sheet(pw, range(100))
+    benchmark.extra_info['http_calls'] = _http_calls(sheet.gc.counter, lambda: [sheet.get_row_value('Sheet1', str(i)) for i in range(1, 21)])
+    benchmark(lambda: [sheet.get_row_value('Sheet1', str(i)) for i in range(1, 21)])
@@ -0,0 +1,43 @@
+import subprocess
+import sys
+
+from conftest import ROOT
+
+# Imports the repository as python_wrappers, imports file_wrapper with an import statement so -X importtime reports it,
+# touches file_io and reports which heavy modules got loaded.
+_snippet = """
+import importlib.util, os, sys
+spec = importlib.util.spec_from_file_location('python_wrappers', os.path.join({root!r}, '__init__.py'), submodule_search_locations=[{root!r}])
+module = importlib.util.module_from_spec(spec)
+sys.modules['python_wrappers'] = module
+spec.loader.exec_module(module)
+import python_wrappers.file_wrapper
+module.file_io
+print(','.join(m for m in ('selenium', 'webdriver_manager', 'googleapiclient', 'gspread', 'google_auth_oauthlib', 'requests') if m in sys.modules))
+"""
+
+# Cumulative import time budget of python_wrappers.file_wrapper, in microseconds. It takes about 10 ms, importing requests alone takes over 100 ms.
+_budget_us = 50000
+
+
+def _import_file_io():
+    return subprocess.run([sys.executable, '-X', 'importtime', '-c', _snippet.format(root=ROOT)],
+                          capture_output=True, text=True, check=True)
+
+
+def _cumulative_us(importtime_output, module):
+    # Lines look like "import time:  self [us] | cumulative | imported package".
+    for line in importtime_output.splitlines():
+        parts = line.split('|')
+        if len(parts) == 3 and parts[2].strip() == module:
+            return int(parts[1])
+    raise AssertionError("{} not found in -X importtime output".format(module))
+
+
+def test_import_file_io(benchmark):
+    outcome = benchmark.pedantic(_import_file_io, rounds=5, iterations=1)
+    assert outcome.stdout.strip() == "", "file_io import loaded: {}".format(outcome.stdout.strip())
+
+    cumulative = _cumulative_us(outcome.stderr, 'python_wrappers.file_wrapper')
+    benchmark.extra_info['file_wrapper_import_us'] = cumulative
+    assert cumulative < _budget_us, "python_wrappers.file_wrapper took {} us to import, budget is {} us".format(cumulative, _budget_us)
@@ -0,0 +1,42 @@
+import random
+
+import pytest
+
+
+def _log_corpus(lines, seed=0):
+    """
+    Synthetic access log with a mix of public, private and IPv6 addresses.
+    """
+    rnd = random.Random(seed)
+    out = []
+    for _ in range(lines):
+        v4 = "{}.{}.{}.{}".format(rnd.choice([8, 10, 172, 192, 203]), rnd.randint(0, 255), rnd.randint(0, 255), rnd.randint(1, 254))
+        v6 = "2001:db8:{:x}:{:x}::{:x}".format(rnd.randint(0, 0xffff), rnd.randint(0, 0xffff), rnd.randint(1, 0xffff))
+        out.append('{} - - [10/Oct/2021:13:55:36 +0000] "GET /index.html HTTP/1.1" 200 2326 "-" "Mozilla/5.0" via {}'.format(v4, v6))
+    return "\n".join(out)
+
+
+CORPUS_SIZES = [100, 10000]
+
+
+@pytest.mark.parametrize('lines', CORPUS_SIZES)
+def test_ipv4_extract(benchmark, pw, lines):
+    text = _log_corpus(lines)
+    assert len(benchmark(pw._ip().ipv4_extract, text)) >= lines
+
+
+@pytest.mark.parametrize('lines', CORPUS_SIZES)
+def test_ipv6_extract(benchmark, pw, lines):
+    text = _log_corpus(lines)
+    assert benchmark(pw._ip().ipv6_extract, text)
+
+
+@pytest.mark.parametrize('lines', CORPUS_SIZES)
+def test_check_ip_local(benchmark, pw, lines):
+    ip = pw._ip()
+    addresses = ip.ipv4_extract(_log_corpus(lines)) + ["not an ip"]
+
+    def classify():
+        return [ip.check_ip_local(a) for a in addresses]
+
+    benchmark(classify)
@@ -0,0 +1,14 @@
+def test_send_message(benchmark, pw, http_stub):
+    t = pw.telegram()
+    t.api_url = http_stub
+    assert benchmark(t.send_message, "benchmark *message*", "123:abc", "42")
+
+
+def test_send_message_burst(benchmark, pw, http_stub):
+    t = pw.telegram()
+    t.api_url = http_stub
+
+    def burst():
+        return [t.send_message("message {}".format(i), "123:abc", "42") for i in range(50)]
+
+    assert all(benchmark(burst))
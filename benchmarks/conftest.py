@@ -0,0 +1,63 @@
+"""
+Benchmarks for the wrappers' hot paths. Everything runs offline against temp files, synthetic data, fakes and local HTTP stubs.
+
+Run from the benchmarks directory:
+    python -m pytest
+Results are saved under benchmarks/.benchmarks, compare a run against the last saved one with:
+    python -m pytest --benchmark-compare --benchmark-compare-fail=mean:10%
+"""
+import importlib.util
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def load_package():
+    """
+    Import the repository as the python_wrappers package, whatever the checkout directory is called.
+    :return: module: python_wrappers package.
+    """
+    if 'python_wrappers' not in sys.modules:
+        spec = importlib.util.spec_from_file_location('python_wrappers', os.path.join(ROOT, '__init__.py'), submodule_search_locations=[ROOT])
+        module = importlib.util.module_from_spec(spec)
+        sys.modules['python_wrappers'] = module
+        spec.loader.exec_module(module)
+    return sys.modules['python_wrappers']
+
+
+@pytest.fixture(scope='session')
+def pw():
+    return load_package()
+
+
+class _stub_handler(BaseHTTPRequestHandler):
+    body = b'{"ok": true, "result": {}}'
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(self.body)))
+        self.end_headers()
+        self.wfile.write(self.body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope='session')
+def http_stub():
+    """
+    Local HTTP server answering every GET with a small JSON body.
+    :return: string: Base URL of the server. Example: http://127.0.0.1:port
+    """
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _stub_handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield "http://127.0.0.1:{}".format(server.server_address[1])
+    server.shutdown()
+    server.server_close()
@@ -5,7 +5,13 @@ import zipfile
 import codecs
 import logging
 
+try:
+    from .instrumentation import instrumented, add_bytes, record_error
+except ImportError:
+    from instrumentation import instrumented, add_bytes, record_error
 
+
+@instrumented('file_io')
 class file_io():
     def __init__(self, file_name):
         """
@@ -23,10 +29,13 @@ class file_io():
         """
         with open(self.file_name, 'r', newline='', encoding='utf-8', errors='ignore') as file:
             if return_list and cleaned:
-                return [line.strip() for line in file.read().split("\n")]
+                content = [line.strip() for line in file.read().split("\n")]
             elif return_list and not cleaned:
-                return file.readlines()
-            return file.read()
+                content = file.readlines()
+            else:
+                content = file.read()
+            add_bytes(file.tell())
+        return content
 
     def write_file_new(self, text_to_write, add_newline=True):
         """
@@ -40,6 +49,7 @@ class file_io():
                 file.write(text_to_write + "\n")
             else:
                 file.write(text_to_write)
+            add_bytes(file.tell())
 
     def write_file_append(self, text_to_write, add_newline=True):
         """
@@ -53,6 +63,7 @@ class file_io():
                 file.write(text_to_write + "\n")
             else:
                 file.write(text_to_write)
+            add_bytes(len(text_to_write.encode('utf-8', errors='ignore')) + add_newline)
 
     def write_csv_from_dict(self, fieldnames: list, dict_to_write: list):
         """
@@ -66,6 +77,7 @@ class file_io():
             writer.writeheader()
             for i in dict_to_write:
                 writer.writerow(i)
+            add_bytes(csvfile.tell())
 
     def read_csv(self):
         """
@@ -73,7 +85,9 @@ class file_io():
         :return: list: nested list of CSV file.
         """
         with open(self.file_name, newline='\n', encoding='utf-8', errors='ignore') as f:
-            return [row for row in csv.reader(f)]
+            rows = [row for row in csv.reader(f)]
+            add_bytes(f.tell())
+        return rows
 
     def write_csv(self, list_to_write):
         """
@@ -86,17 +100,22 @@ class file_io():
                 writer = csv.writer(file, delimiter=',', quotechar='"', quoting=csv.QUOTE_ALL)
                 for row in list_to_write:
                     writer.writerow(row)
+                add_bytes(file.tell())
             return True
         except:
+            record_error()
             return False
 
     def read_json(self):
         with open(self.file_name, 'r', newline='\n', encoding='utf-8', errors='ignore') as json_file:
-            return json.load(json_file)
+            data = json.load(json_file)
+            add_bytes(json_file.tell())
+        return data
 
     def write_json(self, json_data):
         with open(self.file_name, 'w+') as outfile:
             json.dump(json_data, outfile)
+            add_bytes(outfile.tell())
 
     def read_file_hex_dump(self):
         """
@@ -107,6 +126,7 @@ class file_io():
         with open(self.file_name, 'rb') as file:
             for chunk in iter(lambda: file.read(32), b''):
                 tmp.append(codecs.encode(chunk, 'hex'))
+            add_bytes(file.tell())
         return tmp
 
 
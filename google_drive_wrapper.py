@@ -1,58 +1,63 @@
 from __future__ import print_function
-import pickle
 import os
 import pathlib
 import io
+import json
 import shutil
+import sqlite3
 import sys
-from googleapiclient.discovery import build, MediaFileUpload
-from googleapiclient.http import MediaIoBaseDownload
-from google_auth_oauthlib.flow import InstalledAppFlow
-from google.auth.transport.requests import Request
+import contextvars
+import hashlib
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
 from traceback import print_exc
 
+try:
+    from .async_pool import async_http
+    from .google_service_pool import service_pool
+    from .instrumentation import instrumented, add_bytes, record_error
+except ImportError:
+    from async_pool import async_http
+    from google_service_pool import service_pool
+    from instrumentation import instrumented, add_bytes, record_error
 
+
+@instrumented('google_drive')
 class google_drive():
+    # Drive API endpoints used by the async methods, and the maximum async requests in flight on one event loop.
+    files_url = "https://www.googleapis.com/drive/v3/files"
+    upload_url = "https://www.googleapis.com/upload/drive/v3/files"
+    async_limit = 50
+
     def __init__(self):
         """
         Initialize your Google Drive class and ensure you are authenticated.
         """
-        self.drive_service = self.authenticate()
+        self.pool = None
+        self.creds = None
+        self.authenticate()
+
+    @property
+    def drive_service(self):
+        """
+        Drive service owned by the calling thread, so the instance can be shared between threads.
+        :return: object: Drive service.
+        """
+        return self.pool.service('drive', 'v3')
 
     def authenticate(self, SCOPES=["https://www.googleapis.com/auth/drive"], oauth_json_file="", pickle_file=""):
         """
         Authenticate against Google Drive. If a valid pickle file is not found, a URL will be provided to login to your Google account.
+        Credentials are loaded once per process and shared through service_pool, so later calls are cheap.
         :param SCOPES: list: Scopes to be used with Google Drive class.
         :param oauth_json_file: string: File, with path, to use for Oauth.
         :param pickle_file: string: File, with path, to use for pickle file.
         :return: object:
         """
-        if not oauth_json_file:
-            oauth_json_file = pathlib.Path(os.path.dirname(os.path.abspath(__file__)) + "/" + "google_drive_key.json").as_posix()
-
-        if not pickle_file:
-            pickle_file = pathlib.Path(os.path.dirname(os.path.abspath(__file__)) + "/" + "token.pickle").as_posix()
-
-        creds = None
-        # The file token.pickle stores the user's access and refresh tokens, and is
-        # created automatically when the authorization flow completes for the first
-        # time.
-        if os.path.exists(pickle_file):
-            with open(pickle_file, 'rb') as token:
-                creds = pickle.load(token)
-
-        # If there are no (valid) credentials available, let the user log in.
-        if not creds or not creds.valid:
-            if creds and creds.expired and creds.refresh_token:
-                creds.refresh(Request())
-            else:
-                flow = InstalledAppFlow.from_client_secrets_file(oauth_json_file, SCOPES)
-                creds = flow.run_local_server(port=0)
-            # Save the credentials for the next run
-            with open(pickle_file, 'wb') as token:
-                pickle.dump(creds, token)
-
-        return build('drive', 'v3', credentials=creds)
+        self.pool = service_pool.oauth(SCOPES=SCOPES, oauth_json_file=oauth_json_file, pickle_file=pickle_file)
+        self.creds = self.pool.credentials()
+        return self.pool.service('drive', 'v3')
 
     def list_folder_content(self, parent_id="", page_size=10, _fields="nextPageToken, files(id, name, parents)"):
         """
@@ -107,6 +112,8 @@ class google_drive():
         :param file_name_to_save_as: string: Name to save file as in current directory.
         :return: boolean: True if file downloaded successfully, False if not.
         """
+        from googleapiclient.http import MediaIoBaseDownload
+
         request = self.drive_service.files().get_media(fileId=file_id)
         fh = io.BytesIO()
         # Initialise a downloader object to download the file
@@ -116,6 +123,7 @@ class google_drive():
             # Download the data in chunks
             while not done:
                 status, done = downloader.next_chunk()
+            add_bytes(fh.tell())
             fh.seek(0)
             # Write the received data to the file
             with open(file_name_to_save_as, 'wb') as f:
@@ -123,35 +131,102 @@ class google_drive():
             # Return True if file Downloaded successfully
             return True
         except:
+            record_error()
             # G-Suite files should be downloaded using export, so if that is the case the warning message is printed.
             warns = 'Only files with binary content can be downloaded. Use Export with Docs Editors files.'
-            if warns in sys.exc_info()[1].content.decode():
+            # Only HttpError carries a response body, connection and file errors do not.
+            if warns in getattr(sys.exc_info()[1], 'content', b'').decode(errors='ignore'):
                 print(warns)
+            else:
+                print(sys.exc_info())
             # json.loads(x[1].content.decode())['error']['errors'][0]['message']
             return False
 
-    def upload_file(self, file_name: str, parent_id="", new_file_name=""):
+    def upload_file(self, file_name: str, parent_id="", new_file_name="", chunk_size=8 * 1024 * 1024, num_retries=5):
         """
         Upload a local file to Google Drive.
         :param parent_id: string: Parent ID to search in for file ID or name.
         :param file_name: string: File name of local file to upload.
-        :param new_file_name: string: File name of file when it is uploaded.
+        :param new_file_name: string: File name of file when it is uploaded. If blank, the local file name is used.
+        :param chunk_size: int: Size in bytes of each resumable upload chunk. Must be a multiple of 256 KB.
+        :param num_retries: int: Number of times a chunk is retried, with backoff, on 5xx or 429 responses.
         :return: string: File ID of file that was uploaded.
         """
-        if not new_file_name:
-            new_file_name = file_name
-
-        media = MediaFileUpload(file_name, resumable=True)
-        file_metadata = {'name': file_name, 'mimeType': '*/*'}
-        if parent_id:
-            file_metadata['parents'] = [parent_id]
-        media = MediaFileUpload(new_file_name, mimetype='*/*', resumable=True)
         try:
-            return self.drive_service.files().create(body=file_metadata, media_body=media, fields='id').execute()['id']
+            return self._upload(self.drive_service, file_name, parent_id, new_file_name, chunk_size, num_retries)
         except:
+            record_error()
             print(sys.exc_info())
             return False
 
+    def upload_many(self, paths: list, parent_id="", workers=4, chunk_size=8 * 1024 * 1024, num_retries=5, skip_existing=True):
+        """
+        Upload many local files to Google Drive in parallel.
+        Each worker thread uses its own Drive service, as the underlying httplib2 transport is not thread-safe.
+        :param paths: list: File names of local files to upload.
+        :param parent_id: string: Folder ID to upload into. If blank, the top directory is used.
+        :param workers: int: Maximum number of files uploaded at the same time.
+        :param chunk_size: int: Size in bytes of each resumable upload chunk. Must be a multiple of 256 KB.
+        :param num_retries: int: Number of times a chunk is retried, with backoff, on 5xx or 429 responses.
+        :param skip_existing: boolean: True skips files whose MD5 already matches a file in the target folder.
+        :return: list: List of dictionaries, one per path, in the same order. Example: {'file_name': 'path', 'id': 'file_id', 'uploaded': True}
+        """
+        existing = {}
+        if skip_existing:
+            for file in self.list_folder_content(parent_id=parent_id or 'root', page_size=1000,
+                                                 _fields="nextPageToken, files(id, md5Checksum, trashed)"):
+                if 'md5Checksum' in file and not file.get('trashed'):
+                    existing[file['md5Checksum']] = file['id']
+
+        def work(path):
+            try:
+                if existing:
+                    md5 = self._md5(path)
+                    if md5 in existing:
+                        return {'file_name': path, 'id': existing[md5], 'uploaded': False}
+                file_id = self._upload(self.drive_service, path, parent_id, "", chunk_size, num_retries)
+            except:
+                record_error()
+                print(sys.exc_info())
+                file_id = False
+            return {'file_name': path, 'id': file_id, 'uploaded': bool(file_id)}
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            # Each upload runs in a copy of this context so instrumentation adds it to this call.
+            futures = [pool.submit(contextvars.copy_context().run, work, path) for path in paths]
+            return [future.result() for future in futures]
+
+    def _upload(self, service, file_name, parent_id, new_file_name, chunk_size, num_retries):
+        """
+        Run a resumable upload of one file with the given Drive service.
+        :return: string: File ID of file that was uploaded.
+        """
+        from googleapiclient.http import MediaFileUpload
+
+        file_metadata = {'name': new_file_name or os.path.basename(file_name), 'mimeType': '*/*'}
+        if parent_id:
+            file_metadata['parents'] = [parent_id]
+        media = MediaFileUpload(file_name, mimetype='*/*', chunksize=chunk_size, resumable=True)
+        request = service.files().create(body=file_metadata, media_body=media, fields='id')
+        response = None
+        while response is None:
+            # next_chunk retries 5xx and 429 responses with exponential backoff.
+            status, response = request.next_chunk(num_retries=num_retries)
+        add_bytes(os.path.getsize(file_name))
+        return response['id']
+
+    def _md5(self, file_name):
+        """
+        MD5 hex digest of a local file, read in chunks.
+        :param file_name: string: File name of local file.
+        :return: string: MD5 hex digest, same format as Drive's md5Checksum.
+        """
+        md5 = hashlib.md5()
+        with open(file_name, 'rb') as file:
+            for chunk in iter(lambda: file.read(1024 * 1024), b''):
+                md5.update(chunk)
+        return md5.hexdigest()
+
     def delete_file(self, file_id):
         """
         Delete file in Google Drive based on the file ID.
@@ -162,9 +237,196 @@ class google_drive():
             self.drive_service.files().delete(fileId=file_id).execute()
             return True
         except:
+            record_error()
             print(sys.exc_info())
             return False
 
+    def delete_many(self, file_ids: list, num_retries=5):
+        """
+        Delete many files in Google Drive, grouping up to 100 deletes per HTTP batch request.
+        :param file_ids: list: IDs of files to delete.
+        :param num_retries: int: Number of times failed deletes are retried, with backoff, on 5xx or rate limit errors.
+        :return: dictionary: File ID to boolean. True if successfully deleted, False if not.
+        """
+        outcome = self._batch_execute({file_id: self.drive_service.files().delete(fileId=file_id) for file_id in file_ids}, num_retries)
+        return {file_id: not isinstance(outcome[file_id], Exception) for file_id in file_ids}
+
+    def create_folders(self, folder_names: list, parent_id="", num_retries=5):
+        """
+        Create many folders within a directory, grouping up to 100 creates per HTTP batch request.
+        :param folder_names: list: Names of new folders.
+        :param parent_id: string: Directory to make the new folders in, blank its top directory.
+        :param num_retries: int: Number of times failed creates are retried, with backoff, on 5xx or rate limit errors.
+        :return: list: Folder ID of each newly created folder, in the order of folder_names. False if not created. Repeated names create one folder each.
+        """
+        requests = {}
+        for i, folder_name in enumerate(folder_names):
+            folder_data = {'name': folder_name, 'mimeType': 'application/vnd.google-apps.folder'}
+            if parent_id:
+                folder_data['parents'] = [parent_id]
+            # Keyed by position, Drive allows several folders with the same name.
+            requests[str(i)] = self.drive_service.files().create(body=folder_data, fields='id')
+
+        outcome = self._batch_execute(requests, num_retries)
+        return [outcome[str(i)]['id'] if not isinstance(outcome[str(i)], Exception) else False for i in range(len(folder_names))]
+
+    def get_metadata_many(self, file_ids: list, _fields="id, name, parents", num_retries=5):
+        """
+        Get metadata of many files, grouping up to 100 gets per HTTP batch request.
+        :param file_ids: list: IDs of files to look up.
+        :param _fields: string: This is used by Google Drive API to set what items to return.
+        :param num_retries: int: Number of times failed gets are retried, with backoff, on 5xx or rate limit errors.
+        :return: dictionary: File ID to dictionary of metadata, False if not found. Example: {'file_id': {'id': 'file_id', 'name': 'file_name', 'parents': ['parent_id']}}
+        """
+        outcome = self._batch_execute({file_id: self.drive_service.files().get(fileId=file_id, fields=_fields) for file_id in file_ids}, num_retries)
+        return {k: v if not isinstance(v, Exception) else False for k, v in outcome.items()}
+
+    def _batch_execute(self, requests: dict, num_retries=5, batch_size=100):
+        """
+        Run requests through HTTP batch requests. Only sub-requests that fail with a retryable error are sent again.
+        :param requests: dictionary: String key to Drive API request.
+        :param num_retries: int: Number of retry rounds for failed sub-requests.
+        :param batch_size: int: Number of sub-requests per batch. 100 is the Drive API maximum.
+        :return: dictionary: Key to response, or to the exception if the sub-request failed.
+        """
+        results = {}
+        pending = list(requests.keys())
+
+        def callback(request_id, response, exception):
+            results[request_id] = exception if exception is not None else response
+
+        for attempt in range(num_retries + 1):
+            if attempt:
+                time.sleep(min(2 ** attempt + random.random(), 60))
+            for i in range(0, len(pending), batch_size):
+                batch = self.drive_service.new_batch_http_request(callback=callback)
+                for key in pending[i:i + batch_size]:
+                    batch.add(requests[key], request_id=key)
+                try:
+                    batch.execute()
+                except Exception as e:
+                    # The whole batch failed, so every sub-request in it failed with the same error.
+                    for key in pending[i:i + batch_size]:
+                        results[key] = e
+            pending = [k for k in pending if self._retryable(results[k])]
+            if not pending:
+                break
+
+        return results
+
+    def _retryable(self, result):
+        """
+        Check if a batch sub-request result is an error worth retrying (5xx, 429, rate limit 403 or a connection error).
+        :param result: Response or exception of a sub-request.
+        :return: boolean: True if the sub-request should be retried.
+        """
+        import httplib2
+        from googleapiclient.errors import HttpError
+
+        if isinstance(result, (OSError, httplib2.HttpLib2Error)):
+            return True
+        if not isinstance(result, HttpError):
+            return False
+        status = result.resp.status
+        return status >= 500 or status == 429 or (status == 403 and b'ratelimitexceeded' in (result.content or b'').lower())
+
+    async def alist_folder_content(self, parent_id="", page_size=100, _fields="nextPageToken, files(id, name, parents)"):
+        """
+        Async version of list_folder_content, calling the Drive API directly with the shared aiohttp session.
+        :param parent_id: string: Parent ID of folder you wish look into. If blank, entire drive will be searched.
+        :param page_size: int: Number of results per page.
+        :param _fields: string: This is used by Google Drive API to set what items to return.
+        :return: list: Nested list of dictionaries based on the _fields parameter. Example: {'id': 'file_id', 'name': 'file_name', 'parents': ['parent_id']}
+        """
+        _results = []
+        params = {'pageSize': page_size, 'fields': _fields}
+        if parent_id:
+            params['q'] = "'{}' in parents".format(parent_id)
+
+        while True:
+            results = await self._arequest_json('GET', self.files_url, params=params)
+            _results.extend(results['files'])
+            if 'nextPageToken' not in results.keys():
+                break
+            params['pageToken'] = results['nextPageToken']
+
+        return _results
+
+    async def adownload_file(self, file_id: str, file_name_to_save_as: str):
+        """
+        Async version of download_file, using the shared aiohttp session.
+        :param file_id: string: File ID of file to download.
+        :param file_name_to_save_as: string: Name to save file as in current directory.
+        :return: boolean: True if file downloaded successfully, False if not.
+        """
+        try:
+            # The body is streamed to the file, so large files are not held in memory.
+            status, headers, body = await async_http.download("{}/{}".format(self.files_url, file_id), file_name_to_save_as, name='google_drive',
+                                                              limit=self.async_limit, headers=await self.pool.aheaders(), params={'alt': 'media'})
+            if status != 200:
+                # Docs Editors files need export instead, the API explains why in the body.
+                print(body.decode('utf-8', errors='ignore'))
+                return False
+            add_bytes(os.path.getsize(file_name_to_save_as))
+            return True
+        except:
+            record_error()
+            print(sys.exc_info())
+            return False
+
+    async def aupload_file(self, file_name: str, parent_id="", new_file_name="", chunk_size=8 * 1024 * 1024):
+        """
+        Async version of upload_file, running a resumable upload with the shared aiohttp session.
+        :param file_name: string: File name of local file to upload.
+        :param parent_id: string: Parent ID to upload into.
+        :param new_file_name: string: File name of file when it is uploaded. If blank, the local file name is used.
+        :param chunk_size: int: Size in bytes of each upload chunk. Must be a multiple of 256 KB.
+        :return: string: File ID of file that was uploaded. False if not uploaded.
+        """
+        try:
+            file_metadata = {'name': new_file_name or os.path.basename(file_name), 'mimeType': '*/*'}
+            if parent_id:
+                file_metadata['parents'] = [parent_id]
+            size = os.path.getsize(file_name)
+
+            status, headers, body = await async_http.request('POST', self.upload_url, name='google_drive', limit=self.async_limit,
+                                                             headers=dict(await self.pool.aheaders(), **{'X-Upload-Content-Length': str(size)}),
+                                                             params={'uploadType': 'resumable', 'fields': 'id'}, json=file_metadata)
+            if status != 200:
+                raise RuntimeError("Drive API returned {}: {}".format(status, body.decode('utf-8', errors='ignore')))
+            location = headers['Location']
+
+            with open(file_name, 'rb') as file:
+                offset = 0
+                while True:
+                    file.seek(offset)
+                    chunk = file.read(chunk_size)
+                    content_range = "bytes {}-{}/{}".format(offset, offset + len(chunk) - 1, size) if chunk else "bytes */{}".format(size)
+                    status, headers, body = await async_http.request('PUT', location, name='google_drive', limit=self.async_limit,
+                                                                     headers={'Content-Range': content_range}, data=chunk)
+                    add_bytes(len(chunk))
+                    if status in (200, 201):
+                        return json.loads(body.decode('utf-8'))['id']
+                    if status != 308:
+                        raise RuntimeError("Drive API returned {}: {}".format(status, body.decode('utf-8', errors='ignore')))
+                    # The server may keep less than was sent. Range, such as "bytes=0-524287", is what it has, none if missing.
+                    offset = int(headers['Range'].rsplit('-', 1)[1]) + 1 if 'Range' in headers else 0
+        except:
+            record_error()
+            print(sys.exc_info())
+            return False
+
+    async def _arequest_json(self, method, url, **kwargs):
+        """
+        Send an authorized Drive API request with the shared aiohttp session and decode the JSON response.
+        :return: dict: Decoded response.
+        """
+        status, headers, body = await async_http.request(method, url, name='google_drive', limit=self.async_limit,
+                                                         headers=await self.pool.aheaders(), **kwargs)
+        if status != 200:
+            raise RuntimeError("Drive API returned {}: {}".format(status, body.decode('utf-8', errors='ignore')))
+        return json.loads(body.decode('utf-8'))
+
     def get_download_link(self, file_id):
         """
         Provide download link of file with file ID provided.
@@ -204,6 +466,7 @@ class google_drive():
         try:
             return self.drive_service.files().create(body=folder_data, fields='id').execute()['id']
         except:
+            record_error()
             print(sys.exc_info())
             return False
 
@@ -221,6 +484,206 @@ class google_drive():
             return {'id': str(self.create_folder(folder_name=folder_name, parent_id=parent_id)), 'name': folder_name, 'parents': [parent_id]}
 
 
+class google_drive_mirror():
+    def __init__(self, drive: google_drive, db_file="", download_dir=""):
+        """
+        Keep a local SQLite mirror of Google Drive file metadata, updated from the Drive changes feed.
+        :param drive: object: Authenticated google_drive class.
+        :param db_file: string: SQLite file, with path, to store the mirror in. If blank, "drive_mirror.db" next to this file is used.
+        :param download_dir: string: If set, new files with binary content, and files whose content changed, are downloaded into this directory
+            as "<file id>_<name>". Local copies are renamed when the file is renamed and deleted when it is removed or trashed.
+        """
+        if not db_file:
+            db_file = pathlib.Path(os.path.dirname(os.path.abspath(__file__)) + "/" + "drive_mirror.db").as_posix()
+
+        self.drive = drive
+        self.download_dir = download_dir
+        self.db = sqlite3.connect(db_file)
+        self.db.row_factory = sqlite3.Row
+        with self.db:
+            self.db.execute("CREATE TABLE IF NOT EXISTS files (id TEXT PRIMARY KEY, name TEXT, parents TEXT, md5 TEXT, modified_time TEXT, synced_at REAL)")
+            self.db.execute("CREATE TABLE IF NOT EXISTS state (key TEXT PRIMARY KEY, value TEXT)")
+            # Files waiting to be downloaded. Kept until the download succeeds, so none are lost once the page token moves on.
+            self.db.execute("CREATE TABLE IF NOT EXISTS downloads (id TEXT PRIMARY KEY)")
+            # Where each downloaded file was saved, so local copies follow renames and removals.
+            self.db.execute("CREATE TABLE IF NOT EXISTS local_files (id TEXT PRIMARY KEY, path TEXT)")
+
+    _file_fields = "id, name, parents, md5Checksum, modifiedTime, trashed"
+
+    def sync(self):
+        """
+        Bring the mirror up to date. The first run lists the whole drive, later runs only apply changes since the last run.
+        :return: list: Changes applied. Example: [{'id': 'file_id', 'removed': False}]
+        """
+        page_token = self._get_state('page_token')
+        if not page_token:
+            return self._full_sync()
+
+        applied = []
+        while page_token:
+            results = self.drive.drive_service.changes().list(
+                pageToken=page_token, pageSize=1000, spaces='drive',
+                fields="nextPageToken, newStartPageToken, changes(fileId, removed, file({}))".format(self._file_fields)).execute()
+
+            with self.db:
+                for change in results.get('changes', []):
+                    file = change.get('file')
+                    if change.get('removed') or not file or file.get('trashed'):
+                        self.db.execute("DELETE FROM files WHERE id = ?", (change['fileId'],))
+                        self.db.execute("DELETE FROM downloads WHERE id = ?", (change['fileId'],))
+                        applied.append({'id': change['fileId'], 'removed': True})
+                    else:
+                        self._upsert(file)
+                        applied.append({'id': file['id'], 'removed': False})
+                # Store progress with each page so an interrupted sync resumes where it stopped.
+                page_token = results.get('nextPageToken')
+                self._set_state('page_token', page_token or results['newStartPageToken'])
+
+        self._sync_local()
+        self._download_pending()
+        return applied
+
+    def _full_sync(self):
+        """
+        List the whole drive into an empty mirror and store the start page token for later runs.
+        :return: list: Files added. Example: [{'id': 'file_id', 'removed': False}]
+        """
+        start_token = self.drive.drive_service.changes().getStartPageToken().execute()['startPageToken']
+        applied = []
+        files = self.drive.list_folder_content(page_size=1000, _fields="nextPageToken, files({})".format(self._file_fields))
+        with self.db:
+            self.db.execute("DELETE FROM files")
+            self.db.execute("DELETE FROM downloads")
+            for file in files:
+                if file.get('trashed'):
+                    continue
+                self._upsert(file)
+                applied.append({'id': file['id'], 'removed': False})
+            self._set_state('page_token', start_token)
+
+        self._sync_local()
+        self._download_pending()
+        return applied
+
+    def get_file(self, file_id):
+        """
+        Get mirrored metadata of a file.
+        :param file_id: string: File ID to look up.
+        :return: dictionary: Example: {'id': 'file_id', 'name': 'file_name', 'parents': ['parent_id'], 'md5': 'md5', 'modified_time': 'time'}. False if not found.
+        """
+        row = self.db.execute("SELECT * FROM files WHERE id = ?", (file_id,)).fetchone()
+        return self._row_to_dict(row) if row else False
+
+    def list_files(self, parent_id=""):
+        """
+        List mirrored files.
+        :param parent_id: string: Parent ID of folder to list. If blank, all mirrored files are listed.
+        :return: list: List of dictionaries, same format as get_file.
+        """
+        if parent_id:
+            rows = self.db.execute("SELECT files.* FROM files, json_each(files.parents) WHERE json_each.value = ?", (parent_id,))
+        else:
+            rows = self.db.execute("SELECT * FROM files")
+        return [self._row_to_dict(row) for row in rows]
+
+    def changed_since(self, timestamp: float):
+        """
+        List mirrored files that were added or changed by a sync after a point in time.
+        :param timestamp: float: Unix time, as from time.time().
+        :return: list: List of dictionaries, same format as get_file.
+        """
+        rows = self.db.execute("SELECT * FROM files WHERE synced_at > ?", (timestamp,))
+        return [self._row_to_dict(row) for row in rows]
+
+    def close(self):
+        """
+        Close the SQLite connection.
+        """
+        self.db.close()
+
+    def _upsert(self, file):
+        """
+        Insert or update a file row from Drive API metadata, and queue it for download if its content is new.
+        """
+        row = self.db.execute("SELECT md5 FROM files WHERE id = ?", (file['id'],)).fetchone()
+        # Only files with binary content have an md5Checksum; Docs Editors files need export instead.
+        # Renames and moves keep the md5, so they are not downloaded again.
+        if self.download_dir and file.get('md5Checksum') and (not row or row['md5'] != file['md5Checksum']):
+            self.db.execute("INSERT OR IGNORE INTO downloads (id) VALUES (?)", (file['id'],))
+        self.db.execute("INSERT OR REPLACE INTO files (id, name, parents, md5, modified_time, synced_at) VALUES (?, ?, ?, ?, ?, ?)",
+                        (file['id'], file.get('name'), json.dumps(file.get('parents', [])), file.get('md5Checksum'), file.get('modifiedTime'), time.time()))
+
+    def _download_pending(self):
+        """
+        Download queued files into download_dir. Files that fail stay queued for the next sync.
+        """
+        if not self.download_dir:
+            return
+        os.makedirs(self.download_dir, exist_ok=True)
+        for row in self.db.execute("SELECT files.id, files.name FROM downloads JOIN files ON files.id = downloads.id").fetchall():
+            path = self._local_path(row['id'], row['name'])
+            if self.drive.download_file(row['id'], path):
+                with self.db:
+                    self.db.execute("DELETE FROM downloads WHERE id = ?", (row['id'],))
+                    self.db.execute("INSERT OR REPLACE INTO local_files (id, path) VALUES (?, ?)", (row['id'], path))
+
+    def _sync_local(self):
+        """
+        Make local copies follow the mirror: delete copies of files no longer mirrored and rename copies of renamed files.
+        Copies that fail to change are retried on the next sync.
+        """
+        if not self.download_dir:
+            return
+        for row in self.db.execute("SELECT local_files.id, local_files.path, files.name FROM local_files "
+                                   "LEFT JOIN files ON files.id = local_files.id").fetchall():
+            try:
+                if row['name'] is None:
+                    # Removed or trashed in Drive.
+                    if os.path.exists(row['path']):
+                        os.remove(row['path'])
+                    with self.db:
+                        self.db.execute("DELETE FROM local_files WHERE id = ?", (row['id'],))
+                    continue
+                path = self._local_path(row['id'], row['name'])
+                if path != row['path']:
+                    if os.path.exists(row['path']):
+                        os.replace(row['path'], path)
+                    with self.db:
+                        self.db.execute("UPDATE local_files SET path = ? WHERE id = ?", (path, row['id']))
+            except OSError:
+                record_error()
+                print(sys.exc_info())
+
+    def _local_path(self, file_id, name):
+        """
+        Path of the local copy of a file in download_dir.
+        """
+        # Drive names may contain path separators, which must not reach the local path.
+        return os.path.join(self.download_dir, "{}_{}".format(file_id, name.replace('/', '_').replace(os.sep, '_')))
+
+    def _get_state(self, key):
+        """
+        Read a value from the state table, None if not set.
+        """
+        row = self.db.execute("SELECT value FROM state WHERE key = ?", (key,)).fetchone()
+        return row['value'] if row else None
+
+    def _set_state(self, key, value):
+        """
+        Write a value to the state table.
+        """
+        self.db.execute("INSERT OR REPLACE INTO state (key, value) VALUES (?, ?)", (key, value))
+
+    def _row_to_dict(self, row):
+        """
+        Convert a files row to the dictionary format returned by get_file.
+        """
+        d = dict(row)
+        d['parents'] = json.loads(d['parents'])
+        del d['synced_at']
+        return d
+
+
 def main():
     google_drive().authenticate()
 
@@ -0,0 +1,245 @@
+import asyncio
+import datetime
+import json
+import os
+import pathlib
+import pickle
+import threading
+
+try:
+    from .instrumentation import add_api_calls
+except ImportError:
+    from instrumentation import add_api_calls
+
+
+class service_pool():
+    # Process-wide registry of pools, one per credential source, and parsed discovery documents.
+    _pools = {}
+    _documents = {}
+    _registry_lock = threading.Lock()
+
+    def __init__(self, creds, pickle_file="", refresh_margin=300):
+        """
+        Hold one set of Google credentials and hand each thread its own authorized transport and services.
+        Normally created through service_pool.oauth or service_pool.service_account so it is shared process-wide.
+        :param creds: object: Google credentials.
+        :param pickle_file: string: If set, refreshed credentials are saved to this file.
+        :param refresh_margin: int: Seconds before expiry at which the credentials are refreshed.
+        """
+        self.creds = creds
+        self.pickle_file = pickle_file
+        self.refresh_margin = datetime.timedelta(seconds=refresh_margin)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._transport_creds = None
+
+    @classmethod
+    def oauth(cls, SCOPES=["https://www.googleapis.com/auth/drive"], oauth_json_file="", pickle_file=""):
+        """
+        Get the shared pool for OAuth user credentials. If a valid pickle file is not found, a URL will be provided to login to your Google account.
+        :param SCOPES: list: Scopes to be used with the credentials.
+        :param oauth_json_file: string: File, with path, to use for Oauth.
+        :param pickle_file: string: File, with path, to use for pickle file.
+        :return: object: service_pool class.
+        """
+        if not oauth_json_file:
+            oauth_json_file = pathlib.Path(os.path.dirname(os.path.abspath(__file__)) + "/" + "google_drive_key.json").as_posix()
+
+        if not pickle_file:
+            pickle_file = pathlib.Path(os.path.dirname(os.path.abspath(__file__)) + "/" + "token.pickle").as_posix()
+
+        key = ('oauth', pickle_file, tuple(SCOPES))
+        with cls._registry_lock:
+            if key not in cls._pools:
+                creds = None
+                # The file token.pickle stores the user's access and refresh tokens, and is
+                # created automatically when the authorization flow completes for the first
+                # time.
+                if os.path.exists(pickle_file):
+                    with open(pickle_file, 'rb') as token:
+                        creds = pickle.load(token)
+
+                # If there are no credentials that can be refreshed, let the user log in.
+                if not creds or not (creds.valid or creds.refresh_token):
+                    from google_auth_oauthlib.flow import InstalledAppFlow
+                    flow = InstalledAppFlow.from_client_secrets_file(oauth_json_file, SCOPES)
+                    creds = flow.run_local_server(port=0)
+                    with open(pickle_file, 'wb') as token:
+                        pickle.dump(creds, token)
+
+                cls._pools[key] = cls(creds, pickle_file=pickle_file)
+            return cls._pools[key]
+
+    @classmethod
+    def service_account(cls, service_account_file, scopes=None):
+        """
+        Get the shared pool for a service account.
+        :param service_account_file: string: Service account file, with path.
+        :param scopes: list: Scopes to be used with the credentials. If blank, gspread's default scopes are used.
+        :return: object: service_pool class.
+        """
+        import gspread
+        from google.oauth2.service_account import Credentials
+
+        if not scopes:
+            scopes = gspread.auth.DEFAULT_SCOPES
+
+        key = ('service_account', str(service_account_file), tuple(scopes))
+        with cls._registry_lock:
+            if key not in cls._pools:
+                cls._pools[key] = cls(Credentials.from_service_account_file(str(service_account_file), scopes=scopes))
+            return cls._pools[key]
+
+    def credentials(self, stale_token=None):
+        """
+        Return the shared credentials, refreshing them first if they are invalid or close to expiry.
+        :param stale_token: string: Token the API rejected. If the credentials still hold it, they are refreshed even if not expired.
+        :return: object: Google credentials.
+        """
+        from google.auth.transport.requests import Request
+
+        with self._lock:
+            expiring = self.creds.expiry and self.creds.expiry - datetime.datetime.utcnow() < self.refresh_margin
+            rejected = stale_token is not None and self.creds.token == stale_token
+            if not self.creds.valid or expiring or rejected:
+                self.creds.refresh(Request())
+                if self.pickle_file:
+                    with open(self.pickle_file, 'wb') as token:
+                        pickle.dump(self.creds, token)
+        return self.creds
+
+    async def aheaders(self):
+        """
+        Authorization header for async requests. Credentials are only refreshed, in a worker thread, when close to expiry.
+        :return: dict: {'Authorization': 'Bearer token'}
+        """
+        creds = self.creds
+        expiring = creds.expiry and creds.expiry - datetime.datetime.utcnow() < self.refresh_margin
+        if not creds.valid or expiring:
+            creds = await asyncio.get_running_loop().run_in_executor(None, self.credentials)
+        return {'Authorization': 'Bearer {}'.format(creds.token)}
+
+    def http(self):
+        """
+        Authorized httplib2 transport owned by the calling thread. httplib2 is not thread-safe, so it is never shared.
+        :return: object: google_auth_httplib2.AuthorizedHttp.
+        """
+        import httplib2
+        import google_auth_httplib2
+
+        if not hasattr(self._local, 'http'):
+            http = google_auth_httplib2.AuthorizedHttp(self._locked_credentials(), http=httplib2.Http())
+            request = http.request
+
+            def counted_request(*args, **kwargs):
+                add_api_calls()
+                return request(*args, **kwargs)
+
+            # Every Drive request, batch or upload chunk goes through here, so API calls are counted in one place.
+            http.request = counted_request
+            self._local.http = http
+        return self._local.http
+
+    def service(self, name='drive', version='v3'):
+        """
+        Google API service owned by the calling thread, built from the static discovery document shipped with googleapiclient.
+        :param name: string: API name. Example: drive
+        :param version: string: API version. Example: v3
+        :return: object: Google API service.
+        """
+        from googleapiclient.discovery import build_from_document
+
+        http = self.http()
+        if not hasattr(self._local, 'services'):
+            self._local.services = {}
+        if (name, version) not in self._local.services:
+            self._local.services[(name, version)] = build_from_document(self._document(name, version), http=http)
+        return self._local.services[(name, version)]
+
+    def gspread_client(self):
+        """
+        gspread client owned by the calling thread.
+        :return: object: gspread.Client.
+        """
+        import gspread
+
+        if not hasattr(self._local, 'gspread_client'):
+            client = gspread.Client(auth=self._locked_credentials())
+            # Count every Sheets request for instrumentation.
+            getattr(client, 'http_client', client).session.hooks['response'].append(lambda response, *args, **kwargs: add_api_calls())
+            self._local.gspread_client = client
+        return self._local.gspread_client
+
+    def _locked_credentials(self):
+        """
+        Credentials handed to the per-thread transports. They refresh through credentials(), under the pool lock and with
+        the pickle write, instead of each transport refreshing the shared credentials itself.
+        :return: object: google.auth.credentials.Credentials.
+        """
+        with self._lock:
+            if self._transport_creds is None:
+                self._transport_creds = _locked_credentials_class()(self)
+            return self._transport_creds
+
+    @classmethod
+    def _document(cls, name, version):
+        """
+        Parse a static discovery document once per process.
+        :param name: string: API name.
+        :param version: string: API version.
+        :return: dict: Discovery document.
+        """
+        from googleapiclient.discovery_cache import get_static_doc
+
+        with cls._registry_lock:
+            if (name, version) not in cls._documents:
+                cls._documents[(name, version)] = json.loads(get_static_doc(name, version))
+            return cls._documents[(name, version)]
+
+
+_locked_credentials_type = None
+
+
+def _locked_credentials_class():
+    """
+    Build the locked credentials class on first use, so importing this module does not import google-auth.
+    :return: class: google.auth.credentials.Credentials subclass taking a service_pool.
+    """
+    global _locked_credentials_type
+    if _locked_credentials_type is None:
+        from google.auth.credentials import Credentials
+
+        class locked_credentials(Credentials):
+            # Base __init__ is not called, every attribute not defined here is read from the pool's credentials.
+            def __init__(self, pool):
+                self._pool = pool
+
+            def __getattr__(self, name):
+                if name == '_pool':
+                    raise AttributeError(name)
+                return getattr(self._pool.creds, name)
+
+            @property
+            def token(self):
+                return self._pool.creds.token
+
+            @property
+            def expiry(self):
+                return self._pool.creds.expiry
+
+            def refresh(self, request):
+                # Called by the transports after a 401, in the thread whose request was rejected. Only the token that
+                # request sent is stale; if another thread already replaced it, nothing is refreshed.
+                self._pool.credentials(stale_token=getattr(self._pool._local, 'applied_token', None))
+
+            def before_request(self, request, method, url, headers):
+                creds = self._pool.credentials()
+                self._pool._local.applied_token = creds.token
+                creds.apply(headers)
+
+        _locked_credentials_type = locked_credentials
+    return _locked_credentials_type
+
+
+if __name__ == '__main__':
+    pass
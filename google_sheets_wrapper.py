@@ -1,10 +1,25 @@
-import gspread
+import json
 import os
 import time
 import pathlib
+from urllib.parse import quote
 
+try:
+    from .async_pool import async_http
+    from .google_service_pool import service_pool
+    from .instrumentation import instrumented, record_error
+except ImportError:
+    from async_pool import async_http
+    from google_service_pool import service_pool
+    from instrumentation import instrumented, record_error
 
+
+@instrumented('google_sheet')
 class google_sheet():
+    # Sheets API values endpoint used by the async methods, and the maximum async requests in flight on one event loop.
+    values_url = "https://sheets.googleapis.com/v4/spreadsheets/{}/values/{}"
+    async_limit = 50
+
     def __init__(self, service_account_file="", sheet_name="", sheet_id=""):
         """
         Initialize Google Sheet class.
@@ -16,7 +31,8 @@ class google_sheet():
         if not service_account_file:
             service_account_file = pathlib.Path(os.path.dirname(os.path.abspath(__file__)) + "/" + "google_sheets_key.json")
 
-        self.gc = gspread.service_account(service_account_file)
+        # Credentials are loaded once per process, each thread gets its own client.
+        self.pool = service_pool.service_account(service_account_file)
 
         if not sheet_name and not sheet_id:
             print("Provide either a sheet name or sheet id")
@@ -31,6 +47,14 @@ class google_sheet():
         if sheet_id:
             self.sheet_name = self.open_sheet()['sheet_name']
 
+    @property
+    def gc(self):
+        """
+        gspread client owned by the calling thread, so the instance can be shared between threads.
+        :return: object: gspread.Client.
+        """
+        return self.pool.gspread_client()
+
     def create_sheet(self, name=""):
         """
         Create a Google spreadsheet from name provided.
@@ -53,6 +77,7 @@ class google_sheet():
             self.gc.del_spreadsheet(file_id=file_id)
             return True
         except:
+            record_error()
             return False
 
     def open_sheet(self):
@@ -78,6 +103,7 @@ class google_sheet():
             self.gc.open(self.sheet_name).share(user, perm_type=perm_type, role=role)
             return True
         except:
+            record_error()
             return False
 
     def create_worksheet(self, worksheet_name, rows="0", cols="0"):
@@ -100,6 +126,7 @@ class google_sheet():
             self.gc.open(self.sheet_name).del_worksheet(worksheet=sh.worksheet(worksheet_name))
             return True
         except:
+            record_error()
             return False
 
     def get_all_worksheets(self):
@@ -129,11 +156,7 @@ class google_sheet():
         :param append: boolean: If True append lists to bottom of worksheet, if False write over.
         :return: boolean: True if completed successfully, False if not.
         """
-        if type(list_to_upload[0]) is dict:
-            tmp_list = [[k for k in list_to_upload[0].keys()]]
-            for _d in list_to_upload:
-                tmp_list.append([v for v in _d.values()])
-            list_to_upload = list(tmp_list)
+        list_to_upload = self._to_rows(list_to_upload)
 
         sh = self.gc.open(self.sheet_name)
         try:
@@ -151,8 +174,56 @@ class google_sheet():
                 )
             return True
         except:
+            record_error()
+            return False
+
+    async def aupload_list(self, worksheet_name, list_to_upload, append=True):
+        """
+        Async version of upload_list, calling the Sheets API directly with the shared aiohttp session.
+        :param worksheet_name: string: Name of worksheet to upload to.
+        :param list_to_upload: list: Nest list of list (or dicts) to upload.
+        :param append: boolean: If True append lists to bottom of worksheet, if False write over.
+        :return: boolean: True if completed successfully, False if not.
+        """
+        try:
+            url = self.values_url.format(self.sheet_id, quote('{}!A1'.format(worksheet_name)))
+            if append:
+                method, url = 'POST', url + ':append'
+            else:
+                method = 'PUT'
+            status, headers, body = await async_http.request(method, url, name='google_sheet', limit=self.async_limit,
+                                                             headers=await self.pool.aheaders(), params={'valueInputOption': 'RAW'},
+                                                             json={'values': self._to_rows(list_to_upload)})
+            return status == 200
+        except:
+            record_error()
             return False
 
+    async def aget_all_values_list(self, worksheet_name):
+        """
+        Async version of get_all_values_list, calling the Sheets API directly with the shared aiohttp session.
+        :param worksheet_name: string: Name of worksheet you wish to pull information from.
+        :return: list: Nested list of lists with all values. Header row is main list index 0.
+        """
+        status, headers, body = await async_http.request('GET', self.values_url.format(self.sheet_id, quote(worksheet_name)),
+                                                         name='google_sheet', limit=self.async_limit, headers=await self.pool.aheaders())
+        if status != 200:
+            raise RuntimeError("Sheets API returned {}: {}".format(status, body.decode('utf-8', errors='ignore')))
+        return json.loads(body.decode('utf-8')).get('values', [])
+
+    def _to_rows(self, list_to_upload):
+        """
+        Convert a nested list of dicts to a nested list of lists with a header row. Lists are returned unchanged.
+        :param list_to_upload: list: Nest list of list (or dicts).
+        :return: list: Nested list of lists.
+        """
+        if type(list_to_upload[0]) is dict:
+            tmp_list = [[k for k in list_to_upload[0].keys()]]
+            for _d in list_to_upload:
+                tmp_list.append([v for v in _d.values()])
+            list_to_upload = list(tmp_list)
+        return list_to_upload
+
     def get_row_value(self, worksheet_name: str, row: str):
         """
         Get row of values from worksheet and return as a nested list.
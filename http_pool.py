@@ -0,0 +1,66 @@
+import threading
+
+try:
+    from .instrumentation import add_api_calls
+except ImportError:
+    from instrumentation import add_api_calls
+
+
+class http_client():
+    # Shared sessions, one per name and set of options, so connections are reused across every wrapper instance.
+    _sessions = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def session(cls, name="default", pool_size=10, timeout=(5, 30), retries=3, backoff_factor=0.5, status_forcelist=(429, 500, 502, 503, 504), read_retries=None):
+        """
+        Get a shared requests.Session with connection pooling, default timeouts and retries.
+        Retries back off exponentially and honor the Retry-After header on 429 and 503 responses.
+        :param name: string: Name of the session. Wrappers use their own name, so they can be configured separately. Example: telegram
+        :param pool_size: int: Number of keep-alive connections kept per host.
+        :param timeout: tuple: (connect, read) timeout in seconds used when a request does not set its own.
+        :param retries: int: Number of retries on connection errors and status_forcelist responses.
+        :param backoff_factor: float: Backoff between retries is backoff_factor * 2 ** (retry number - 1) seconds.
+        :param status_forcelist: tuple: Response status codes that are retried.
+        :param read_retries: int: Number of retries on errors after the request was sent, such as a read timeout. If None, retries is used.
+            Use 0, and leave 5xx out of status_forcelist, for requests that must not be sent twice.
+        :return: object: requests.Session.
+        """
+        if read_retries is None:
+            read_retries = retries
+        key = (name, pool_size, timeout, retries, backoff_factor, tuple(status_forcelist), read_retries)
+        with cls._lock:
+            if key not in cls._sessions:
+                cls._sessions[key] = cls._build(pool_size, timeout, retries, backoff_factor, status_forcelist, read_retries)
+            return cls._sessions[key]
+
+    @classmethod
+    def _build(cls, pool_size, timeout, retries, backoff_factor, status_forcelist, read_retries):
+        """
+        Build a requests.Session mounted with a pooled, retrying adapter that applies a default timeout.
+        :return: object: requests.Session.
+        """
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+
+        class timeout_adapter(HTTPAdapter):
+            def send(self, request, **kwargs):
+                if kwargs.get('timeout') is None:
+                    kwargs['timeout'] = timeout
+                return super().send(request, **kwargs)
+
+        retry = Retry(total=retries, connect=retries, read=read_retries, status=retries, backoff_factor=backoff_factor,
+                      status_forcelist=status_forcelist, respect_retry_after_header=True, raise_on_status=False)
+        adapter = timeout_adapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+
+        session = requests.Session()
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        # Count every request for instrumentation.
+        session.hooks['response'].append(lambda response, *args, **kwargs: add_api_calls())
+        return session
+
+
+if __name__ == '__main__':
+    pass
@@ -0,0 +1,254 @@
+import bisect
+import contextvars
+import functools
+import inspect
+import sys
+import threading
+import time
+
+# Instrumentation is off until enable() is called. While off, an instrumented method costs one flag check.
+_enabled = False
+_sinks = []
+_current = contextvars.ContextVar('instrumentation_call', default=None)
+
+
+def enable(*sinks):
+    """
+    Start recording instrumented calls and send each one to the sinks.
+    :param sinks: objects: Sinks with a record(call) method, called when a call ends, and optionally a start(call) method,
+        called when it starts. Example: memory_registry(), otel_sink()
+    :return:
+    """
+    global _enabled
+    _sinks[:] = sinks
+    _enabled = bool(sinks)
+
+
+def disable():
+    """
+    Stop recording instrumented calls.
+    :return:
+    """
+    global _enabled
+    _enabled = False
+    _sinks[:] = []
+
+
+def instrumented(prefix):
+    """
+    Class decorator that instruments every public method of the class.
+    Each call records latency, bytes moved, API calls made and the exception type if it failed, then is passed to the sinks.
+    :param prefix: string: Name used before the method name. Example: file_io gives file_io.read_file
+    :return: function: Class decorator.
+    """
+    def decorate(cls):
+        for attr, value in list(vars(cls).items()):
+            if not attr.startswith('_') and inspect.isfunction(value):
+                setattr(cls, attr, _wrap("{}.{}".format(prefix, attr), value))
+        return cls
+    return decorate
+
+
+def _wrap(name, fn):
+    if inspect.iscoroutinefunction(fn):
+        @functools.wraps(fn)
+        async def async_wrapper(*args, **kwargs):
+            if not _enabled:
+                return await fn(*args, **kwargs)
+
+            call, token = _start(name)
+            try:
+                return await fn(*args, **kwargs)
+            except BaseException as e:
+                call['error'] = type(e).__name__
+                raise
+            finally:
+                _finish(call, token)
+        return async_wrapper
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        if not _enabled:
+            return fn(*args, **kwargs)
+
+        call, token = _start(name)
+        try:
+            return fn(*args, **kwargs)
+        except BaseException as e:
+            call['error'] = type(e).__name__
+            raise
+        finally:
+            _finish(call, token)
+    return wrapper
+
+
+def _start(name):
+    call = {'name': name, 'seconds': 0.0, 'bytes': 0, 'api_calls': 0, 'error': None,
+            'start_ns': time.time_ns(), 'end_ns': 0, 'parent': _current.get(), 'perf': time.perf_counter()}
+    for sink in _sinks:
+        if hasattr(sink, 'start'):
+            sink.start(call)
+    return call, _current.set(call)
+
+
+def _finish(call, token):
+    call['seconds'] = time.perf_counter() - call.pop('perf')
+    call['end_ns'] = time.time_ns()
+    _current.reset(token)
+    for sink in _sinks:
+        sink.record(call)
+
+
+def add_bytes(count: int):
+    """
+    Add bytes read or written to the running instrumented call and the calls it is nested in.
+    :param count: int: Number of bytes.
+    :return:
+    """
+    call = _current.get() if _enabled else None
+    while call is not None:
+        call['bytes'] += count
+        call = call['parent']
+
+
+def add_api_calls(count=1):
+    """
+    Add HTTP requests made to the running instrumented call and the calls it is nested in.
+    :param count: int: Number of requests.
+    :return:
+    """
+    call = _current.get() if _enabled else None
+    while call is not None:
+        call['api_calls'] += count
+        call = call['parent']
+
+
+def record_error():
+    """
+    Record the exception being handled on the running instrumented call. Use inside except blocks that return False.
+    :return:
+    """
+    call = _current.get() if _enabled else None
+    if call is not None and sys.exc_info()[0] is not None:
+        call['error'] = sys.exc_info()[0].__name__
+
+
+class memory_registry():
+    def __init__(self, buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)):
+        """
+        In-memory sink. Keeps call counts, latency histograms, bytes, API calls and exception counts per method.
+        :param buckets: tuple: Upper bounds in seconds of the latency histogram buckets.
+        """
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self.reset()
+
+    def record(self, call):
+        """
+        Add a finished call to the registry.
+        :param call: dict: Call recorded by an instrumented method.
+        :return:
+        """
+        with self._lock:
+            m = self._methods.get(call['name'])
+            if m is None:
+                m = self._methods[call['name']] = {'calls': 0, 'seconds': 0.0, 'bytes': 0, 'api_calls': 0,
+                                                   'errors': {}, 'buckets': [0] * (len(self.buckets) + 1)}
+            m['calls'] += 1
+            m['seconds'] += call['seconds']
+            m['bytes'] += call['bytes']
+            m['api_calls'] += call['api_calls']
+            m['buckets'][bisect.bisect_left(self.buckets, call['seconds'])] += 1
+            if call['error']:
+                m['errors'][call['error']] = m['errors'].get(call['error'], 0) + 1
+
+    def reset(self):
+        """
+        Clear all recorded calls.
+        :return:
+        """
+        with self._lock:
+            self._methods = {}
+
+    def snapshot(self):
+        """
+        Copy of everything recorded so far.
+        :return: dict: Method name to stats. Example: {'file_io.read_file': {'calls': 1, 'seconds': 0.01, 'bytes': 10, 'api_calls': 0, 'errors': {}, 'buckets': [...]}}
+        """
+        with self._lock:
+            return {k: dict(v, errors=dict(v['errors']), buckets=list(v['buckets'])) for k, v in self._methods.items()}
+
+    def prometheus_text(self, namespace="python_wrappers"):
+        """
+        Render the registry in the Prometheus text exposition format.
+        :param namespace: string: Prefix of the metric names.
+        :return: string: Metrics text.
+        """
+        snapshot = self.snapshot()
+        lines = []
+        for metric, key, kind in [('calls_total', 'calls', 'counter'), ('bytes_total', 'bytes', 'counter'),
+                                  ('api_calls_total', 'api_calls', 'counter')]:
+            lines.append("# TYPE {}_{} {}".format(namespace, metric, kind))
+            for name, m in sorted(snapshot.items()):
+                lines.append('{}_{}{{method="{}"}} {}'.format(namespace, metric, name, m[key]))
+
+        lines.append("# TYPE {}_errors_total counter".format(namespace))
+        for name, m in sorted(snapshot.items()):
+            for error, count in sorted(m['errors'].items()):
+                lines.append('{}_errors_total{{method="{}",exception="{}"}} {}'.format(namespace, name, error, count))
+
+        lines.append("# TYPE {}_call_seconds histogram".format(namespace))
+        for name, m in sorted(snapshot.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), m['buckets']):
+                cumulative += count
+                lines.append('{}_call_seconds_bucket{{method="{}",le="{}"}} {}'.format(namespace, name, bound, cumulative))
+            lines.append('{}_call_seconds_sum{{method="{}"}} {}'.format(namespace, name, m['seconds']))
+            lines.append('{}_call_seconds_count{{method="{}"}} {}'.format(namespace, name, m['calls']))
+        return "\n".join(lines) + "\n"
+
+
+class otel_sink():
+    def __init__(self, tracer=None):
+        """
+        Sink that turns each call into an OpenTelemetry span. Requires the opentelemetry-api package.
+        :param tracer: object: OpenTelemetry tracer. If blank, one named python_wrappers is used.
+        """
+        from opentelemetry import trace
+
+        self._trace = trace
+        self.tracer = tracer or trace.get_tracer("python_wrappers")
+
+    def start(self, call):
+        """
+        Start the span of a call as a child of the span of the call it is nested in, so traces keep the call tree.
+        Top level calls are children of the span current in the application, if any.
+        :param call: dict: Call started by an instrumented method.
+        :return:
+        """
+        parent = call['parent']
+        context = None
+        if parent is not None and id(self) in parent.get('spans', {}):
+            context = self._trace.set_span_in_context(parent['spans'][id(self)])
+        call.setdefault('spans', {})[id(self)] = self.tracer.start_span(call['name'], context=context, start_time=call['start_ns'])
+
+    def record(self, call):
+        """
+        End the span of a finished call, using the call's own end time.
+        :param call: dict: Call recorded by an instrumented method.
+        :return:
+        """
+        span = call.get('spans', {}).get(id(self))
+        if span is None:
+            # The sink was enabled while the call was running.
+            span = self.tracer.start_span(call['name'], start_time=call['start_ns'])
+        span.set_attribute('bytes', call['bytes'])
+        span.set_attribute('api_calls', call['api_calls'])
+        if call['error']:
+            span.set_attribute('exception.type', call['error'])
+            span.set_status(self._trace.Status(self._trace.StatusCode.ERROR))
+        span.end(end_time=call['end_ns'])
+
+
+if __name__ == '__main__':
+    pass
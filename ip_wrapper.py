@@ -2,11 +2,39 @@ import ipaddress
 import json
 import random
 import re
-import requests
 import socket
 
+try:
+    from .async_pool import async_http
+    from .http_pool import http_client
+    from .instrumentation import instrumented, add_bytes
+except ImportError:
+    from async_pool import async_http
+    from http_pool import http_client
+    from instrumentation import instrumented, add_bytes
 
+
+@instrumented('_ip')
 class _ip():
+    # Maximum async lookups in flight on one event loop.
+    async_limit = 100
+
+    def __init__(self, session=None):
+        """
+        Initialize IP class.
+        :param session: object: requests.Session to use for web lookups. If blank, the shared http_client.session("ip") is used.
+        """
+        self._session = session
+
+    def _http(self):
+        """
+        Session used for web lookups, created on first use.
+        :return: object: requests.Session.
+        """
+        if self._session is None:
+            self._session = http_client.session("ip")
+        return self._session
+
     def ipv4_extract(self, text: str):
         """
         Extract IPv4 addresses from string.
@@ -62,7 +90,8 @@ class _ip():
         _d = {'ip': '', 'hostname': '', 'org': '', 'country': '', 'region': '', 'city': '', 'anycast': '', 'timezone': '', 'local_ip': None}
         _d['local_ip'] = 'True' if self.check_ip_local(ip) else 'False'
 
-        outcome = requests.get("https://ipinfo.io/{}".format(ip))
+        outcome = self._http().get("https://ipinfo.io/{}".format(ip))
+        add_bytes(len(outcome.content))
         if outcome.status_code != 200:
             _d['local_ip'] = 'None'
 
@@ -72,6 +101,26 @@ class _ip():
 
         return _d
 
+    async def aipinfo_io(self, ip: str):
+        """
+        Async version of ipinfo_io, using the shared aiohttp session.
+        :param ip: string: IP address to find information on.
+        :return: dict: {'ip': '', 'hostname': '', 'org': '', 'country': '', 'region': '', 'city': '', 'anycast': '', 'timezone': '', 'local_ip': None}
+        """
+        _d = {'ip': '', 'hostname': '', 'org': '', 'country': '', 'region': '', 'city': '', 'anycast': '', 'timezone': '', 'local_ip': None}
+        _d['local_ip'] = 'True' if self.check_ip_local(ip) else 'False'
+
+        status, headers, body = await async_http.request('GET', "https://ipinfo.io/{}".format(ip), name='ip', limit=self.async_limit)
+        add_bytes(len(body))
+        if status != 200:
+            _d['local_ip'] = 'None'
+
+        content = json.loads(body.decode('utf-8'))
+        for k in [k for k in _d.keys() if k != 'local_ip']:
+            _d[k] = content[k] if k in content.keys() else 'None'
+
+        return _d
+
     def get_external_ip(self):
         """
         Return the external IP address from where script is being run. Multiple sources just to not bother any service too much.
@@ -83,12 +132,17 @@ class _ip():
         random.shuffle(sources)
 
         for s in sources:
-            content = requests.get(s)
+            try:
+                content = self._http().get(s)
+            except:
+                # A source that is down or times out should not stop the others from being tried.
+                continue
+            add_bytes(len(content.content))
             if content.status_code != 200:
                 continue
-            t = self.ipv4_extract(content.text.strip())[0]
-            if self.check_ip_local(t) is False:
-                return t
+            found = self.ipv4_extract(content.text.strip())
+            if found and self.check_ip_local(found[0]) is False:
+                return found[0]
 
         return "Could not get external IP address."
 
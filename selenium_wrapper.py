@@ -1,20 +1,68 @@
+import base64
+import os
+import pathlib
+import threading
 import time
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from contextlib import contextmanager
+from urllib.parse import urlsplit
 
-from selenium import webdriver
-from selenium.webdriver.common.desired_capabilities import DesiredCapabilities
-from webdriver_manager.chrome import ChromeDriverManager
+try:
+    from .instrumentation import instrumented
+except ImportError:
+    from instrumentation import instrumented
 
 
+@instrumented('_selenium')
 class _selenium():
-    def chrome_driver(self, user_agent="", headless=True, dl_path=""):
+    # Resolved chromedriver path, shared by every instance in the process.
+    _driver_path = ""
+    _driver_path_lock = threading.Lock()
+
+    def driver_path(self, cache_file="", refresh=False):
+        """
+        Path of the chromedriver binary. ChromeDriverManager is only asked once, after that the path is read from a cache file so no network is used.
+        :param cache_file: string: File, with path, to store the resolved path in. If blank, "chromedriver_path.txt" next to this file is used.
+        :param refresh: boolean: True ignores the cached path and asks ChromeDriverManager again, for when the cached driver no longer starts.
+        :return: string: Path of the chromedriver binary.
+        """
+        from webdriver_manager.chrome import ChromeDriverManager
+
+        if not cache_file:
+            cache_file = pathlib.Path(os.path.dirname(os.path.abspath(__file__)) + "/" + "chromedriver_path.txt").as_posix()
+
+        with _selenium._driver_path_lock:
+            if not refresh and _selenium._driver_path and os.path.isfile(_selenium._driver_path):
+                return _selenium._driver_path
+
+            if not refresh and os.path.isfile(cache_file):
+                with open(cache_file, 'r', encoding='utf-8') as file:
+                    path = file.read().strip()
+                if os.path.isfile(path):
+                    _selenium._driver_path = path
+                    return path
+
+            _selenium._driver_path = ChromeDriverManager().install()
+            with open(cache_file, 'w', encoding='utf-8') as file:
+                file.write(_selenium._driver_path)
+            return _selenium._driver_path
+
+    def chrome_driver(self, user_agent="", headless=True, dl_path="", fast=False, page_load_strategy="eager", block_types=("image", "font", "stylesheet", "media"), block_urls=()):
         """
         Start a local Google Chrome driver using selenium.
         For a fresh and easy install, the diver is handled by webdriver_manager.chrome.ChromeDriverManager.
         :param user_agent: string: set a specific user agent you wish to use for the driver.
         :param headless: boolean: True makes the driver headless.
         :param dl_path: string: Set a specific path for files to be downloaded when using the driver.
+        :param fast: boolean: True uses the fast profile. See fast_profile and block_resources.
+        :param page_load_strategy: string: Page load strategy of the fast profile, "eager" or "none".
+        :param block_types: tuple: Resource types blocked by the fast profile. Options: image, font, stylesheet, media.
+        :param block_urls: tuple: Extra URL patterns blocked by the fast profile, wildcards allowed. Example: "*google-analytics.com*"
         :return: object: The chrome driver object is returned. It is typically handed to a variable for further usage.
         """
+        from selenium import webdriver
+
         options = webdriver.ChromeOptions()
 
         if not user_agent:
@@ -31,15 +79,39 @@ class _selenium():
 
         # Experimental preferences.
         prefs = {"profile.default_content_setting_values.notifications": 2}
-        options.add_experimental_option("prefs", prefs)
 
         if dl_path:
-            prefs = {'download.default_directory': dl_path}
-            options.add_experimental_option("prefs", prefs)
+            prefs['download.default_directory'] = dl_path
+
+        if fast:
+            self.fast_profile(options, prefs, page_load_strategy=page_load_strategy)
+
+        options.add_experimental_option("prefs", prefs)
 
-        return webdriver.Chrome(ChromeDriverManager().install(), options=options)
+        driver = self._start_chrome(options)
+        if fast:
+            self.block_resources(driver, block_types=block_types, block_urls=block_urls)
+        return driver
 
-    def remote_selenium_driver(self, hub_ip_port="192.168.152.162:4444", browser="chrome", user_agent="", headless=True, sleep=0, dl_path=""):
+    def _start_chrome(self, options):
+        """
+        Start Chrome with the cached chromedriver. If Chrome was updated past the cached driver's version, the path is
+        resolved again and the start retried once. A cached driver that was deleted is already resolved again by driver_path.
+        :param options: object: Chrome options.
+        :return: object: Selenium driver.
+        """
+        from selenium import webdriver
+        from selenium.common.exceptions import SessionNotCreatedException
+
+        try:
+            return webdriver.Chrome(self.driver_path(), options=options)
+        except SessionNotCreatedException as e:
+            # Other failures, such as Chrome crashing on start or bad options, are not fixed by a new driver download.
+            if 'only supports chrome version' not in str(e).lower():
+                raise
+        return webdriver.Chrome(self.driver_path(refresh=True), options=options)
+
+    def remote_selenium_driver(self, hub_ip_port="192.168.152.162:4444", browser="chrome", user_agent="", headless=True, sleep=0, dl_path="", fast=False, page_load_strategy="eager"):
         """
         Start a local Google Chrome driver using selenium. This is only for usage with Selenium Grid.
         :param hub_ip_port: string: The IP and Port of the Selenium Grid Hub. Example: 192.168.152.162:4444
@@ -48,8 +120,13 @@ class _selenium():
         :param headless: boolean: True makes the driver headless.
         :param sleep: int: Optional time to sleep when starting the driver.
         :param dl_path: string: Set a specific path for files to be downloaded when using the driver. This is the path on the remote node being used, plan accordingly.
+        :param fast: boolean: True uses the fast profile. See fast_profile. Grid sessions have no CDP, so only images are blocked.
+        :param page_load_strategy: string: Page load strategy of the fast profile, "eager" or "none".
         :return: object: The chrome driver object is returned. It is typically handed to a variable for further usage.
         """
+        from selenium import webdriver
+        from selenium.webdriver.common.desired_capabilities import DesiredCapabilities
+
         if not user_agent:
             user_agent = """Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/90.0.4430.212 Safari/537.36"""
 
@@ -62,21 +139,33 @@ class _selenium():
         if headless:
             options.add_argument("--headless")
 
+        prefs = {}
         if dl_path:
-            p = {'download.default_directory': dl_path}
-            options.add_experimental_option("prefs", p)
+            prefs['download.default_directory'] = dl_path
+
+        if fast:
+            self.fast_profile(options, prefs, page_load_strategy=page_load_strategy)
+
+        if prefs:
+            options.add_experimental_option("prefs", prefs)
 
         return webdriver.Remote('http://{}/wd/hub'.format(hub_ip_port), DesiredCapabilities.CHROME, options=options)
 
-    def beta_chrome_driver(self, user_agent="", headless=True, dl_path="", proxy={}):
+    def beta_chrome_driver(self, user_agent="", headless=True, dl_path="", proxy={}, fast=False, page_load_strategy="eager", block_types=("image", "font", "stylesheet", "media"), block_urls=()):
         """
         Trying to get proxy working. Don't use this yet.
         :param user_agent:
         :param headless:
         :param dl_path:
         :param proxy:
+        :param fast:
+        :param page_load_strategy:
+        :param block_types:
+        :param block_urls:
         :return:
         """
+        from selenium import webdriver
+
         options = webdriver.ChromeOptions()
 
         if not user_agent:
@@ -102,13 +191,381 @@ class _selenium():
 
         # Experimental preferences.
         prefs = {"profile.default_content_setting_values.notifications": 2}
-        options.add_experimental_option("prefs", prefs)
 
         if dl_path:
-            prefs = {'download.default_directory': dl_path}
-            options.add_experimental_option("prefs", prefs)
+            prefs['download.default_directory'] = dl_path
+
+        if fast:
+            self.fast_profile(options, prefs, page_load_strategy=page_load_strategy)
+
+        options.add_experimental_option("prefs", prefs)
+
+        driver = self._start_chrome(options)
+        if fast:
+            self.block_resources(driver, block_types=block_types, block_urls=block_urls)
+        return driver
+
+    # File extensions blocked by block_resources for each resource type.
+    _blocked_type_extensions = {
+        'image': ["png", "jpg", "jpeg", "gif", "webp", "svg", "ico", "bmp", "avif"],
+        'font': ["woff", "woff2", "ttf", "otf", "eot"],
+        'stylesheet': ["css"],
+        'media': ["mp4", "webm", "ogg", "mp3", "wav", "m3u8"],
+    }
+
+    def fast_profile(self, options, prefs: dict, page_load_strategy="eager"):
+        """
+        Set options for pages where only the DOM is needed: do not wait for the full load event, disable images and background features.
+        :param options: object: webdriver.ChromeOptions to change.
+        :param prefs: dict: Experimental preferences to merge into. The caller adds them to options.
+        :param page_load_strategy: string: "eager" waits for DOMContentLoaded, "none" returns straight away.
+        :return: object: webdriver.ChromeOptions.
+        """
+        options.page_load_strategy = page_load_strategy
+        prefs['profile.managed_default_content_settings.images'] = 2
+        for argument in ['--blink-settings=imagesEnabled=false', '--disable-extensions', '--disable-background-networking',
+                         '--disable-default-apps', '--disable-sync', '--disable-component-update', '--no-first-run',
+                         '--mute-audio', '--disable-features=Translate,MediaRouter,OptimizationHints']:
+            options.add_argument(argument)
+        return options
+
+    def block_resources(self, driver, block_types=("image", "font", "stylesheet", "media"), block_urls=()):
+        """
+        Block requests by resource type or URL pattern using CDP Network.setBlockedURLs. Only works with local Chrome drivers.
+        :param driver: object: Selenium driver.
+        :param block_types: tuple: Resource types to block. Options: image, font, stylesheet, media.
+        :param block_urls: tuple: Extra URL patterns to block, wildcards allowed. Example: "*google-analytics.com*"
+        :return: object: Selenium driver.
+        """
+        # Patterns are matched against the whole URL, page navigations included. The "*://*/" prefix keeps the extension
+        # out of the host name, so https://www.css-tricks.com/ loads while /style.css and /style.css?v=3 are blocked.
+        patterns = [p for t in block_types for e in self._blocked_type_extensions[t]
+                    for p in ("*://*/*.{}".format(e), "*://*/*.{}?*".format(e))]
+        patterns += list(block_urls)
+        if patterns:
+            driver.execute_cdp_cmd('Network.enable', {})
+            driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': patterns})
+        return driver
+
+
+class driver_pool():
+    def __init__(self, min_size=0, max_size=4, max_uses=50, remote=False, **driver_kwargs):
+        """
+        Pool of reusable Selenium drivers. Drivers are reset between jobs, health checked on checkout and recycled after a number of uses.
+        :param min_size: int: Number of drivers started up front and kept available.
+        :param max_size: int: Maximum number of drivers alive at the same time.
+        :param max_uses: int: Number of checkouts after which a driver is quit and replaced.
+        :param remote: boolean: True uses _selenium.remote_selenium_driver (Selenium Grid), False uses _selenium.chrome_driver.
+        :param driver_kwargs: Parameters passed to the driver method. Example: headless=True, hub_ip_port="192.168.152.162:4444"
+        """
+        self.min_size = min_size
+        self.max_size = max(max_size, 1)
+        self.max_uses = max_uses
+        self.remote = remote
+        self.driver_kwargs = driver_kwargs
+        self._idle = []
+        self._uses = {}
+        self._size = 0
+        self._closed = False
+        self._cond = threading.Condition()
+
+        for _ in range(min(min_size, self.max_size)):
+            with self._cond:
+                self._size += 1
+            self._idle.append(self._start())
+
+    def checkout(self, timeout=None):
+        """
+        Get a healthy driver from the pool, starting a new one if none are idle and the pool is not full.
+        :param timeout: int: Seconds to wait for a driver when the pool is full. None waits forever.
+        :return: object: Selenium driver.
+        """
+        deadline = time.time() + timeout if timeout is not None else None
+        while True:
+            with self._cond:
+                if self._closed:
+                    raise RuntimeError("Driver pool is closed.")
+                if self._idle:
+                    driver = self._idle.pop()
+                elif self._size < self.max_size:
+                    self._size += 1
+                    driver = None
+                else:
+                    remaining = deadline - time.time() if deadline is not None else None
+                    if remaining is not None and remaining <= 0:
+                        raise TimeoutError("No driver available in pool.")
+                    self._cond.wait(remaining)
+                    continue
+
+            if driver is None:
+                return self._start()
+            if self.healthy(driver):
+                return driver
+            self._discard(driver)
+
+    def checkin(self, driver):
+        """
+        Return a driver to the pool. Its state is reset, or it is quit if it reached max_uses or the reset fails.
+        :param driver: object: Selenium driver from checkout.
+        :return:
+        """
+        self._uses[id(driver)] = self._uses.get(id(driver), 0) + 1
+        if self._closed or self._uses[id(driver)] >= self.max_uses or not self.reset(driver):
+            self._discard(driver)
+            self._replenish()
+            return
+
+        with self._cond:
+            self._idle.append(driver)
+            self._cond.notify()
+
+    def checkin_crashed(self, driver):
+        """
+        Return a driver whose session died. It is quit and its place in the pool is freed for a new session.
+        :param driver: object: Selenium driver from checkout.
+        :return:
+        """
+        self._discard(driver)
+        self._replenish()
+
+    @contextmanager
+    def driver(self, timeout=None):
+        """
+        Check out a driver for the length of a with block.
+        :param timeout: int: Seconds to wait for a driver when the pool is full. None waits forever.
+        :return: object: Selenium driver.
+        """
+        driver = self.checkout(timeout=timeout)
+        try:
+            yield driver
+        finally:
+            self.checkin(driver)
+
+    def healthy(self, driver):
+        """
+        Check that a driver session still responds.
+        :param driver: object: Selenium driver.
+        :return: boolean: True if the session responds, False if not.
+        """
+        try:
+            return driver.execute_script("return 1") == 1
+        except:
+            return False
+
+    def reset(self, driver):
+        """
+        Clear cookies, storage and tabs so the next job starts clean. The job's tabs are replaced by a new tab, which
+        also drops their sessionStorage and history.
+        Local drivers clear cookies of every site, and storage of every origin the job's tabs navigated to, through CDP.
+        Grid sessions have no CDP, so only the cookies and localStorage of the page open in the first tab are cleared.
+        Other origins keep theirs until the driver is replaced, so use a low max_uses with remote pools if jobs must not share state.
+        :param driver: object: Selenium driver.
+        :return: boolean: True if reset successfully, False if not.
+        """
+        cdp = hasattr(driver, 'execute_cdp_cmd')
+        try:
+            handles = driver.window_handles
+            origins = set()
+            for handle in handles:
+                driver.switch_to.window(handle)
+                if cdp:
+                    for entry in driver.execute_cdp_cmd('Page.getNavigationHistory', {})['entries']:
+                        url = urlsplit(entry['url'])
+                        if url.scheme in ('http', 'https'):
+                            origins.add("{}://{}".format(url.scheme, url.netloc))
+
+            driver.switch_to.window(handles[0])
+            try:
+                driver.execute_script("window.localStorage.clear();")
+            except:
+                # Pages such as about:blank have no storage.
+                pass
+            if not cdp:
+                driver.delete_all_cookies()
+
+            driver.switch_to.new_window('tab')
+            fresh = driver.current_window_handle
+            for handle in handles:
+                driver.switch_to.window(handle)
+                driver.close()
+            driver.switch_to.window(fresh)
+
+            if cdp:
+                driver.execute_cdp_cmd('Network.clearBrowserCookies', {})
+                for origin in origins:
+                    driver.execute_cdp_cmd('Storage.clearDataForOrigin', {'origin': origin, 'storageTypes': 'all'})
+            return True
+        except:
+            return False
+
+    def close(self):
+        """
+        Quit all idle drivers. Drivers checked in later are quit as well.
+        :return:
+        """
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._cond.notify_all()
+        for driver in idle:
+            self._discard(driver)
+
+    def _start(self):
+        """
+        Start a new driver. The caller must already have counted it in _size.
+        :return: object: Selenium driver.
+        """
+        try:
+            if self.remote:
+                return _selenium().remote_selenium_driver(**self.driver_kwargs)
+            return _selenium().chrome_driver(**self.driver_kwargs)
+        except:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+
+    def _discard(self, driver):
+        """
+        Quit a driver and free its place in the pool.
+        :param driver: object: Selenium driver.
+        :return:
+        """
+        self._uses.pop(id(driver), None)
+        try:
+            driver.quit()
+        except:
+            pass
+        with self._cond:
+            self._size -= 1
+            self._cond.notify()
+
+    def _replenish(self):
+        """
+        Start drivers until min_size are alive again.
+        :return:
+        """
+        while True:
+            with self._cond:
+                if self._closed or self._size >= self.min_size:
+                    return
+                self._size += 1
+            driver = self._start()
+            with self._cond:
+                self._idle.append(driver)
+                self._cond.notify()
+
+
+class scrape_scheduler():
+    def __init__(self, sessions=4, per_domain=2, retries=2, remote=False, **driver_kwargs):
+        """
+        Run a callback over many URLs spread across a pool of Selenium sessions.
+        :param sessions: int: Number of driver sessions, and pages loaded, at the same time.
+        :param per_domain: int: Maximum number of pages of the same domain loaded at the same time.
+        :param retries: int: Number of times a URL is retried on a new session when its driver crashes.
+        :param remote: boolean: True uses Selenium Grid sessions, False uses local Chrome. See driver_pool.
+        :param driver_kwargs: Parameters passed to the driver method. Example: headless=True, hub_ip_port="192.168.152.162:4444"
+        """
+        self.sessions = max(sessions, 1)
+        self.per_domain = max(per_domain, 1)
+        self.retries = retries
+        self.pool = driver_pool(max_size=self.sessions, remote=remote, **driver_kwargs)
+
+    def run(self, urls, callback):
+        """
+        Load each URL and call callback(driver, url) on it. Results are yielded as they finish, not in input order.
+        :param urls: iterable: URLs to scrape. Read lazily, so a generator can be used.
+        :param callback: function: Called with the driver after the page is loaded. Its return value is the result.
+        :return: generator: Dictionaries. Example: {'url': 'url', 'result': 'callback return', 'error': None, 'attempts': 1}
+        """
+        urls = iter(urls)
+        # Domain to URLs waiting for a free slot of their domain, and domain to pages loading now.
+        # Only URLs that can start are sent to the executor, so a busy domain never holds a session slot.
+        deferred = defaultdict(deque)
+        active = defaultdict(int)
+        waiting = 0
+
+        def next_url():
+            nonlocal waiting
+            for domain, queue in deferred.items():
+                if active[domain] < self.per_domain:
+                    waiting -= 1
+                    url = queue.popleft()
+                    if not queue:
+                        del deferred[domain]
+                    return url
+            # Only read ahead a little, so huge URL lists are not queued in memory.
+            while waiting < self.sessions * 4:
+                url = next(urls, None)
+                if url is None:
+                    return None
+                if active[self._domain(url)] < self.per_domain:
+                    return url
+                deferred[self._domain(url)].append(url)
+                waiting += 1
+            return None
+
+        with ThreadPoolExecutor(max_workers=self.sessions) as executor:
+            running = {}
+            while True:
+                while len(running) < self.sessions:
+                    url = next_url()
+                    if url is None:
+                        break
+                    active[self._domain(url)] += 1
+                    running[executor.submit(self._job, url, callback)] = self._domain(url)
+                if not running:
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    active[running.pop(future)] -= 1
+                    yield future.result()
+
+    def close(self):
+        """
+        Quit all sessions of the scheduler.
+        :return:
+        """
+        self.pool.close()
+
+    def _job(self, url, callback):
+        """
+        Scrape one URL, replacing the session and retrying if the driver crashes.
+        :param url: string: URL to scrape.
+        :param callback: function: Called with the driver after the page is loaded.
+        :return: dict: Same format as run.
+        """
+        attempts = 0
+        while True:
+            attempts += 1
+            try:
+                driver = self.pool.checkout()
+            except Exception as e:
+                # No session could be started, or the pool was closed.
+                return {'url': url, 'result': None, 'error': e, 'attempts': attempts}
+            try:
+                driver.get(url)
+                result = callback(driver, url)
+            except Exception as e:
+                if self.pool.healthy(driver):
+                    # The page or callback failed, not the session.
+                    self.pool.checkin(driver)
+                    return {'url': url, 'result': None, 'error': e, 'attempts': attempts}
+                self.pool.checkin_crashed(driver)
+                if attempts > self.retries:
+                    return {'url': url, 'result': None, 'error': e, 'attempts': attempts}
+                continue
+            self.pool.checkin(driver)
+            return {'url': url, 'result': result, 'error': None, 'attempts': attempts}
+
+    def _domain(self, url):
+        """
+        Domain used to limit how many pages of the same site are loaded at the same time.
+        :param url: string: URL to look up.
+        :return: string: Lowercase host and port of the URL.
+        """
+        return urlsplit(url).netloc.lower()
 
-        return webdriver.Chrome(ChromeDriverManager().install(), options=options)
 
 class acts():
     def scroll_to_bottom(self, driver):
@@ -132,6 +589,7 @@ class acts():
     def scroll_down_loop(self, driver, multiples=50, sleep_time=.1):
         """
         Makes the driver scroll to the bottom of the page in a controlled pace.
+        For lazy loading pages that keep growing, use scroll_until_loaded.
         :param driver: object: Selenium driver.
         :param multiples: int: Scroll the entire length in multiples. Page length / multiples = size of single scroll.
         :param sleep_time: int: Sleep between each scroll down.
@@ -146,9 +604,76 @@ class acts():
             time.sleep(sleep_time)
         return driver
 
+    # Runs inside the page. Scrolls to the bottom every time the page grows and calls back once it stops growing.
+    _scroll_until_loaded_js = """
+        var done = arguments[arguments.length - 1];
+        var timeout = arguments[0] * 1000, idle = arguments[1] * 1000, selector = arguments[2], target = arguments[3];
+        var start = performance.now(), rounds = 0, finished = false, idleTimer = null;
+        function height() { return Math.max(document.body.scrollHeight, document.documentElement.scrollHeight); }
+        function count() { return selector ? document.querySelectorAll(selector).length : 0; }
+        function scroll() { window.scrollTo(0, height()); }
+        var lastHeight = height();
+        var sentinel = document.createElement('div');
+        sentinel.style.cssText = 'height:1px;width:1px;';
+        document.body.appendChild(sentinel);
+        function finish(reason) {
+            if (finished) { return; }
+            finished = true;
+            mutations.disconnect();
+            visibility.disconnect();
+            clearTimeout(idleTimer);
+            clearTimeout(hardTimer);
+            sentinel.remove();
+            done({height: height(), elapsed: (performance.now() - start) / 1000, rounds: rounds, count: count(), reason: reason});
+        }
+        function armIdle() {
+            clearTimeout(idleTimer);
+            idleTimer = setTimeout(function () { finish('idle'); }, idle);
+        }
+        var mutations = new MutationObserver(function () {
+            if (target && count() >= target) { return finish('target'); }
+            var h = height();
+            if (h > lastHeight) {
+                lastHeight = h;
+                rounds++;
+                document.body.appendChild(sentinel);
+                scroll();
+                armIdle();
+            }
+        });
+        mutations.observe(document.body, {childList: true, subtree: true});
+        // Keep the end of the page in view while content is still arriving.
+        var visibility = new IntersectionObserver(function (entries) {
+            if (!entries[0].isIntersecting) { scroll(); }
+        });
+        visibility.observe(sentinel);
+        var hardTimer = setTimeout(function () { finish('timeout'); }, timeout);
+        if (target && count() >= target) { finish('target'); } else { scroll(); armIdle(); }
+    """
+
+    def scroll_until_loaded(self, driver, timeout=30, idle_time=1.5, target_selector="", target_count=0):
+        """
+        Scroll an infinite-scroll page until it stops growing, in a single async script.
+        The page height is watched with a MutationObserver, so no time is spent sleeping in fixed steps.
+        Note: The driver's script timeout is raised to a little over timeout while scrolling, then restored.
+        :param driver: object: Selenium driver.
+        :param timeout: int: Maximum seconds to keep scrolling.
+        :param idle_time: float: Seconds without the page growing before loading is considered finished.
+        :param target_selector: string: CSS selector of content items to count. Example: "div.post"
+        :param target_count: int: Stop once target_selector matches this many elements. 0 disables the target.
+        :return: dict: {'height': 0, 'elapsed': 0.0, 'rounds': 0, 'count': 0, 'reason': 'idle'}. Reason is idle, target or timeout.
+        """
+        script_timeout = driver.timeouts.script
+        driver.set_script_timeout(timeout + idle_time + 5)
+        try:
+            return driver.execute_async_script(self._scroll_until_loaded_js, timeout, idle_time, target_selector, target_count)
+        finally:
+            driver.set_script_timeout(script_timeout)
+
     def window_to_page_size(self, driver, atleast_1920=True):
         """
         Reshape window size to page size.
+        To capture the whole page without resizing the window, use save_full_page_screenshot.
         :param driver: object: Selenium driver.
         :param atleast_1920: If the page is smaller than 1920x1080, use 1920 length or 1080 width (done separately).
         :return: object: Selenium driver.
@@ -163,6 +688,77 @@ class acts():
         driver.set_window_size(total_width, total_height)
         return driver
 
+    def page_size(self, driver):
+        """
+        Get the full content size of the page using CDP Page.getLayoutMetrics. Only works with local Chrome drivers.
+        :param driver: object: Selenium driver.
+        :return: tuple: (width, height) in CSS pixels.
+        """
+        metrics = driver.execute_cdp_cmd('Page.getLayoutMetrics', {})
+        size = metrics.get('cssContentSize', metrics['contentSize'])
+        return int(size['width']), int(size['height'])
+
+    def save_full_page_screenshot(self, driver, file_name: str, image_format="png", quality=80, tile_height=0, max_height=4096):
+        """
+        Save a screenshot of the whole page using CDP Page.captureScreenshot with captureBeyondViewport. The window is not resized.
+        Pages taller than max_height are captured in tiles, each saved as its own numbered file, so no single bitmap grows with
+        the page. Example: page.png becomes page_0000.png, page_0001.png, ... from top to bottom.
+        Only works with local Chrome drivers.
+        :param driver: object: Selenium driver.
+        :param file_name: string: File, with path, to save the screenshot to.
+        :param image_format: string: Options: png, jpeg, webp.
+        :param quality: int: Compression quality 0-100. Only used for jpeg and webp.
+        :param tile_height: int: Height in pixels of each tile. If 0, pages up to max_height are saved as one file and taller pages in tiles of max_height.
+        :param max_height: int: Tallest page, in pixels, saved as a single file when tile_height is 0.
+        :return: list: List of saved files, from top to bottom.
+        """
+        width, height = self.page_size(driver)
+        if not tile_height and height > max_height:
+            tile_height = max_height
+        params = {'format': image_format, 'captureBeyondViewport': True}
+        if image_format != 'png':
+            params['quality'] = quality
+
+        if not tile_height or tile_height >= height:
+            clips = [(file_name, 0, height)]
+        else:
+            root, ext = os.path.splitext(file_name)
+            clips = [("{}_{:04d}{}".format(root, num, ext), y, min(tile_height, height - y))
+                     for num, y in enumerate(range(0, height, tile_height))]
+
+        saved = []
+        for name, y, clip_height in clips:
+            params['clip'] = {'x': 0, 'y': y, 'width': width, 'height': clip_height, 'scale': 1}
+            data = driver.execute_cdp_cmd('Page.captureScreenshot', params)['data']
+            with open(name, 'wb') as file:
+                file.write(base64.b64decode(data))
+            saved.append(name)
+        return saved
+
+    def save_pdf(self, driver, file_name: str, print_background=True, landscape=False, chunk_size=1024 * 1024):
+        """
+        Save the page as a PDF using CDP Page.printToPDF. The PDF is streamed to disk in chunks. Only works with headless local Chrome drivers.
+        :param driver: object: Selenium driver.
+        :param file_name: string: File, with path, to save the PDF to.
+        :param print_background: boolean: True prints background graphics.
+        :param landscape: boolean: True prints in landscape orientation.
+        :param chunk_size: int: Number of bytes read from the browser per request.
+        :return: string: File name of saved PDF.
+        """
+        stream = driver.execute_cdp_cmd('Page.printToPDF', {'printBackground': print_background, 'landscape': landscape,
+                                                            'transferMode': 'ReturnAsStream'})['stream']
+        try:
+            with open(file_name, 'wb') as file:
+                while True:
+                    chunk = driver.execute_cdp_cmd('IO.read', {'handle': stream, 'size': chunk_size})
+                    data = chunk.get('data', '')
+                    file.write(base64.b64decode(data) if chunk.get('base64Encoded') else data.encode('latin-1'))
+                    if chunk.get('eof'):
+                        break
+        finally:
+            driver.execute_cdp_cmd('IO.close', {'handle': stream})
+        return file_name
+
 
 def main():
     pass
@@ -1,7 +1,40 @@
-import requests
+import json
 
+try:
+    from .async_pool import async_http
+    from .http_pool import http_client
+    from .instrumentation import instrumented, record_error
+except ImportError:
+    from async_pool import async_http
+    from http_pool import http_client
+    from instrumentation import instrumented, record_error
 
+
+@instrumented('telegram')
 class telegram():
+    # Base URL of the Bot API. Can be pointed at a local Bot API server.
+    api_url = "https://api.telegram.org"
+    # Maximum async messages in flight on one event loop.
+    async_limit = 100
+
+    def __init__(self, session=None):
+        """
+        Initialize Telegram class.
+        :param session: object: requests.Session to use for the Bot API. If blank, the shared http_client.session("telegram"), which does not resend messages, is used.
+        """
+        self._session = session
+
+    def _http(self):
+        """
+        Session used for the Bot API, created on first use.
+        :return: object: requests.Session.
+        """
+        if self._session is None:
+            # sendMessage is not idempotent: a read timeout or 5xx may come after Telegram accepted the message, so only
+            # connection errors and 429, which mean it was not sent, are retried.
+            self._session = http_client.session("telegram", status_forcelist=(429,), read_retries=0)
+        return self._session
+
     def send_message(self, message: str, token: str, chat_id: str):
         """
         Send a message to a Telegram channel using a bot.
@@ -10,11 +43,31 @@ class telegram():
         :param chat_id: string: Chat ID of where message should be sent.
         :return: boolean: True if sent successfully, False if not.
         """
-        s = 'https://api.telegram.org/bot{}/sendMessage?chat_id={}&parse_mode=Markdown&text={}'.format(token, chat_id, message)
+        s = '{}/bot{}/sendMessage'.format(self.api_url, token)
+        try:
+            self._http().get(s, params={'chat_id': chat_id, 'parse_mode': 'Markdown', 'text': message}).json()
+            return True
+        except:
+            record_error()
+            return False
+
+    async def asend_message(self, message: str, token: str, chat_id: str):
+        """
+        Async version of send_message, using the shared aiohttp session.
+        :param message: string: Message to send.
+        :param token: string: Token of bot to use.
+        :param chat_id: string: Chat ID of where message should be sent.
+        :return: boolean: True if sent successfully, False if not.
+        """
+        s = '{}/bot{}/sendMessage'.format(self.api_url, token)
         try:
-            requests.get(s).json()
+            # Not idempotent, so only retried when the message was not sent. See _http.
+            status, headers, body = await async_http.request('GET', s, name='telegram', limit=self.async_limit, status_forcelist=(429,), read_retries=0,
+                                                             params={'chat_id': chat_id, 'parse_mode': 'Markdown', 'text': message})
+            json.loads(body.decode('utf-8'))
             return True
         except:
+            record_error()
             return False
 
 
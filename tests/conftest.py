@@ -0,0 +1,94 @@
+"""
+Tests for the wrappers' concurrency, retry and timeout behaviour. Everything runs offline against fakes and local HTTP servers,
+except the headless Chrome tests, which are skipped when Chrome and chromedriver are not installed.
+
+Run from the tests directory:
+    python -m pytest
+"""
+import importlib.util
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def load_package():
+    """
+    Import the repository as the python_wrappers package, whatever the checkout directory is called.
+    :return: module: python_wrappers package.
+    """
+    if 'python_wrappers' not in sys.modules:
+        spec = importlib.util.spec_from_file_location('python_wrappers', os.path.join(ROOT, '__init__.py'), submodule_search_locations=[ROOT])
+        module = importlib.util.module_from_spec(spec)
+        sys.modules['python_wrappers'] = module
+        spec.loader.exec_module(module)
+    return sys.modules['python_wrappers']
+
+
+@pytest.fixture(scope='session')
+def pw():
+    return load_package()
+
+
+class scripted_server():
+    def __init__(self):
+        """
+        Local HTTP server answering each request with the next scripted response, then with the last one.
+        Responses are (status, headers, body, delay). Delay is slept before answering, to trigger read timeouts.
+        """
+        self.responses = [(200, {}, b'{"ok": true}', 0)]
+        self.requests = []
+        server = self
+
+        class handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.requests.append((self.command, self.path))
+                status, headers, body, delay = server.responses[min(len(server.requests), len(server.responses)) - 1]
+                time.sleep(delay)
+                try:
+                    self.send_response(status)
+                    for key, value in dict(headers, **{'Content-Length': str(len(body))}).items():
+                        self.send_header(key, value)
+                    self.end_headers()
+                    self.wfile.write(body)
+                except OSError:
+                    # The client gave up waiting.
+                    pass
+
+            do_POST = do_GET
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+        self._server.daemon_threads = True
+        self.url = "http://127.0.0.1:{}".format(self._server.server_address[1])
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    def script(self, *responses):
+        """
+        Set the responses and forget earlier requests.
+        :param responses: tuple: (status, headers, body, delay) per request.
+        """
+        self.responses = list(responses)
+        self.requests = []
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+@pytest.fixture
+def server():
+    """
+    Scripted local HTTP server, see scripted_server.
+    :return: object: scripted_server.
+    """
+    server = scripted_server()
+    yield server
+    server.close()
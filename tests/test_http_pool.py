@@ -0,0 +1,83 @@
+import asyncio
+import uuid
+
+import pytest
+
+requests = pytest.importorskip('requests')
+
+
+def _session(pw, **kwargs):
+    # A unique name gives each test its own session and connection pool.
+    return pw.http_client.session(uuid.uuid4().hex, backoff_factor=0, **kwargs)
+
+
+def test_retries_503_honoring_retry_after(pw, server):
+    server.script((503, {'Retry-After': '1'}, b'busy', 0), (200, {}, b'{"ok": true}', 0))
+    response = _session(pw).get(server.url + "/")
+    assert response.status_code == 200
+    assert len(server.requests) == 2
+
+
+def test_gives_up_after_retries(pw, server):
+    server.script((502, {}, b'bad gateway', 0))
+    response = _session(pw, retries=2).get(server.url + "/")
+    assert response.status_code == 502
+    assert len(server.requests) == 3
+
+
+def test_default_read_timeout(pw, server):
+    server.script((200, {}, b'{}', 2))
+    with pytest.raises(requests.exceptions.ConnectionError):
+        _session(pw, timeout=(1, 0.2), retries=0).get(server.url + "/")
+
+
+def test_read_timeout_not_retried_with_read_retries_0(pw, server):
+    server.script((200, {}, b'{}', 1), (200, {}, b'{}', 0))
+    with pytest.raises(requests.exceptions.ConnectionError):
+        _session(pw, timeout=(1, 0.2), read_retries=0).get(server.url + "/")
+    assert len(server.requests) == 1
+
+
+def test_telegram_does_not_resend_on_5xx(pw, server):
+    server.script((502, {}, b'{"ok": false}', 0), (200, {}, b'{"ok": true}', 0))
+    bot = pw.telegram()
+    bot.api_url = server.url
+    bot.send_message("hello", "token", "chat")
+    assert len(server.requests) == 1
+
+
+def test_telegram_retries_429(pw, server):
+    server.script((429, {'Retry-After': '0'}, b'{"ok": false}', 0), (200, {}, b'{"ok": true}', 0))
+    bot = pw.telegram()
+    bot.api_url = server.url
+    assert bot.send_message("hello", "token", "chat")
+    assert len(server.requests) == 2
+
+
+def test_async_telegram_does_not_resend_on_5xx(pw, server):
+    pytest.importorskip('aiohttp')
+    async def send():
+        try:
+            return await bot.asend_message("hello", "token", "chat")
+        finally:
+            await pw.async_http.close()
+
+    server.script((502, {}, b'{"ok": false}', 0), (200, {}, b'{"ok": true}', 0))
+    bot = pw.telegram()
+    bot.api_url = server.url
+    asyncio.run(send())
+    assert len(server.requests) == 1
+
+
+def test_async_retries_503(pw, server):
+    pytest.importorskip('aiohttp')
+    async def get():
+        try:
+            return await pw.async_http.request('GET', server.url + "/", backoff_factor=0)
+        finally:
+            await pw.async_http.close()
+
+    server.script((503, {'Retry-After': '0'}, b'busy', 0), (200, {}, b'{"ok": true}', 0))
+    status, headers, body = asyncio.run(get())
+    assert status == 200
+    assert len(server.requests) == 2
@@ -0,0 +1,221 @@
+import os
+import shutil
+import threading
+import time
+from collections import defaultdict
+from urllib.parse import urlsplit
+
+import pytest
+
+
+class _tracker():
+    # Counts pages loading at the same time, in total and per domain, across every fake driver.
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.active = defaultdict(int)
+        self.total = 0
+        self.max_active = defaultdict(int)
+        self.max_total = 0
+        self.started = 0
+        self.quit = 0
+
+
+class _switch_to():
+    def __init__(self, driver):
+        self.driver = driver
+
+    def window(self, handle):
+        self.driver.current_window_handle = handle
+
+    def new_window(self, kind):
+        self.driver.window_handles.append("tab_{}".format(len(self.driver.window_handles)))
+        self.driver.current_window_handle = self.driver.window_handles[-1]
+
+
+class _driver():
+    def __init__(self, tracker, load_time=0.0, crash_urls=()):
+        """
+        Fake Selenium driver. Loading a URL in crash_urls kills the session, like a crashed Chrome.
+        """
+        self.tracker = tracker
+        self.load_time = load_time
+        self.crash_urls = crash_urls
+        self.alive = True
+        self.window_handles = ["tab_0"]
+        self.current_window_handle = "tab_0"
+        self.switch_to = _switch_to(self)
+
+    def get(self, url):
+        if not self.alive:
+            raise RuntimeError("session is gone")
+        domain = urlsplit(url).netloc
+        with self.tracker.lock:
+            self.tracker.active[domain] += 1
+            self.tracker.total += 1
+            self.tracker.max_active[domain] = max(self.tracker.max_active[domain], self.tracker.active[domain])
+            self.tracker.max_total = max(self.tracker.max_total, self.tracker.total)
+        try:
+            time.sleep(self.load_time)
+            if url in self.crash_urls:
+                self.alive = False
+                raise RuntimeError("chrome not reachable")
+        finally:
+            with self.tracker.lock:
+                self.tracker.active[domain] -= 1
+                self.tracker.total -= 1
+
+    def execute_script(self, script):
+        if not self.alive:
+            raise RuntimeError("session is gone")
+        return 1
+
+    def delete_all_cookies(self):
+        pass
+
+    def close(self):
+        self.window_handles.remove(self.current_window_handle)
+
+    def quit(self):
+        with self.tracker.lock:
+            self.tracker.quit += 1
+
+
+@pytest.fixture
+def fake_chrome(pw, monkeypatch):
+    """
+    Make driver_pool start fake drivers instead of Chrome.
+    :return: function: Configure with load_time and crash_urls, returns the tracker.
+    """
+    selenium_wrapper = pytest.importorskip('python_wrappers.selenium_wrapper')
+
+    def configure(load_time=0.0, crash_urls=(), fail=False):
+        tracker = _tracker()
+
+        def chrome_driver(self, **kwargs):
+            if fail:
+                raise RuntimeError("chrome failed to start")
+            with tracker.lock:
+                tracker.started += 1
+            return _driver(tracker, load_time, crash_urls)
+
+        monkeypatch.setattr(selenium_wrapper._selenium, 'chrome_driver', chrome_driver)
+        return tracker
+    return configure
+
+
+def _urls(domains, per_domain):
+    # Grouped by domain, the worst order for a scheduler that blocks on busy domains.
+    return ["http://d{}.test/{}".format(d, i) for d in range(domains) for i in range(per_domain)]
+
+
+def test_per_domain_cap_and_all_sessions_used(pw, fake_chrome):
+    tracker = fake_chrome(load_time=0.2)
+    scheduler = pw.scrape_scheduler(sessions=4, per_domain=1)
+    start = time.perf_counter()
+    results = list(scheduler.run(_urls(4, 4), lambda driver, url: url))
+    elapsed = time.perf_counter() - start
+    scheduler.close()
+
+    assert sorted(r['result'] for r in results) == sorted(_urls(4, 4))
+    assert max(tracker.max_active.values()) == 1
+    assert tracker.max_total == 4
+    # 16 pages, 4 at a time, 0.2 s each: 0.8 s when no session waits on a busy domain.
+    assert elapsed < 1.4
+
+
+def test_per_domain_cap_above_one(pw, fake_chrome):
+    tracker = fake_chrome(load_time=0.05)
+    scheduler = pw.scrape_scheduler(sessions=6, per_domain=2)
+    results = list(scheduler.run(_urls(2, 10), lambda driver, url: url))
+    scheduler.close()
+
+    assert len(results) == 20
+    assert max(tracker.max_active.values()) == 2
+    assert tracker.max_total <= 4
+
+
+def test_crashed_session_is_replaced_and_retried(pw, fake_chrome):
+    tracker = fake_chrome(crash_urls=("http://d0.test/crash",))
+    scheduler = pw.scrape_scheduler(sessions=2, per_domain=1, retries=2)
+    results = {r['url']: r for r in scheduler.run(["http://d0.test/crash", "http://d1.test/ok"], lambda driver, url: url)}
+    scheduler.close()
+
+    # The crashing URL kills every session it runs on, so it is tried retries + 1 times.
+    assert results["http://d0.test/crash"]['attempts'] == 3
+    assert isinstance(results["http://d0.test/crash"]['error'], RuntimeError)
+    assert results["http://d1.test/ok"]['error'] is None
+    # Each crashed session is quit and a new one started for the next attempt.
+    assert tracker.started >= 3
+    assert tracker.quit >= 3
+
+
+def test_callback_error_is_not_retried(pw, fake_chrome):
+    fake_chrome()
+    scheduler = pw.scrape_scheduler(sessions=1, per_domain=1, retries=2)
+
+    def callback(driver, url):
+        raise ValueError("parse failed")
+
+    results = list(scheduler.run(["http://d0.test/1"], callback))
+    scheduler.close()
+    assert results[0]['attempts'] == 1
+    assert isinstance(results[0]['error'], ValueError)
+
+
+def test_session_start_failure_is_an_error_result(pw, fake_chrome):
+    fake_chrome(fail=True)
+    scheduler = pw.scrape_scheduler(sessions=2, per_domain=1)
+    results = list(scheduler.run(_urls(2, 2), lambda driver, url: url))
+    scheduler.close()
+    assert len(results) == 4
+    assert all(isinstance(r['error'], RuntimeError) for r in results)
+
+
+def test_results_stream_in_finish_order(pw, fake_chrome):
+    fake_chrome()
+    scheduler = pw.scrape_scheduler(sessions=2, per_domain=1)
+
+    def callback(driver, url):
+        if url.endswith("/slow"):
+            time.sleep(0.3)
+        return url
+
+    results = [r['url'] for r in scheduler.run(["http://d0.test/slow", "http://d1.test/fast"], callback)]
+    scheduler.close()
+    assert results == ["http://d1.test/fast", "http://d0.test/slow"]
+
+
+def test_urls_are_read_lazily(pw, fake_chrome):
+    fake_chrome()
+    scheduler = pw.scrape_scheduler(sessions=2, per_domain=1)
+    consumed = []
+
+    def urls():
+        for i in range(10000):
+            consumed.append(i)
+            yield "http://d{}.test/{}".format(i % 3, i)
+
+    first = next(scheduler.run(urls(), lambda driver, url: url))
+    scheduler.close()
+    assert first['error'] is None
+    # Sessions running plus the bounded read-ahead of deferred URLs.
+    assert len(consumed) <= 2 + 2 * 4 + 1
+
+
+def _chrome_available():
+    return shutil.which('chromedriver') and any(shutil.which(b) for b in ('google-chrome', 'chromium', 'chromium-browser', 'chrome'))
+
+
+@pytest.mark.skipif(not _chrome_available(), reason="Chrome and chromedriver are not installed")
+def test_headless_chrome(pw, server, monkeypatch):
+    selenium_wrapper = pytest.importorskip('python_wrappers.selenium_wrapper')
+    # Use the installed chromedriver instead of downloading one.
+    monkeypatch.setattr(selenium_wrapper._selenium, '_driver_path', os.path.realpath(shutil.which('chromedriver')))
+    server.script((200, {'Content-Type': 'text/html'}, b'<html><head><title>stub</title></head><body></body></html>', 0))
+
+    scheduler = pw.scrape_scheduler(sessions=2, per_domain=2, headless=True)
+    urls = ["{}/{}".format(server.url, i) for i in range(4)]
+    results = list(scheduler.run(urls, lambda driver, url: driver.title))
+    scheduler.close()
+    assert [r['error'] for r in results] == [None] * 4
+    assert {r['result'] for r in results} == {'stub'}